@@ -11,6 +11,7 @@ from aiogram_dialog.widgets.kbd import Button, Row, Column, Multiselect
 from aiogram_dialog.widgets.text import Const, Format
 
 from db_layer.db_factory import get_data_serice
+from news_processing.scheduler import scheduler
 from states_class_aiogram_dialog import MainDialogSG, SecondDialogSG
 
 
@@ -152,6 +153,7 @@ async def handle_channel_name(
                             )
                             await db.add_publish_date(news_id, ['everyday'])
                             await db.add_publish_time(news_id, ['every--hour'])
+                            scheduler.reschedule(news_id)
                     await message.answer("Підписка успішно збережена в базі даних!")
                 except Exception as e:
                     await message.answer("❌ Сталася помилка при збереженні підписки.")
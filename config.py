@@ -51,3 +51,96 @@ AZURE_SQL_USER = os.getenv("AZURE_SQL_USER")
 AZURE_SQL_PASSWORD = os.getenv("AZURE_SQL_PASSWORD")
 AZURE_SQL_CONNECTION_STRING = f"Driver={{ODBC Driver 17 for SQL Server}};Server={AZURE_SQL_SERVER};Database={AZURE_SQL_DATABASE};UID={AZURE_SQL_USER};PWD={AZURE_SQL_PASSWORD}"
 
+
+# Обмеження паралельності публікації: кількість каналів, що обробляються одночасно,
+# та ліміти окремих етапів (запити до Bing, виклики LLM, Playwright, рендеринг зображень)
+PUBLISH_CONCURRENCY = int(get_env_variable("PUBLISH_CONCURRENCY", 8))
+BING_CONCURRENCY = int(get_env_variable("BING_CONCURRENCY", 4))
+LLM_CONCURRENCY = int(get_env_variable("LLM_CONCURRENCY", 4))
+BROWSER_CONCURRENCY = int(get_env_variable("BROWSER_CONCURRENCY", 2))
+RENDER_CONCURRENCY = int(get_env_variable("RENDER_CONCURRENCY", 2))
+
+# Горизонтальне масштабування публікації: кількість процесів-воркерів,
+# тривалість оренди публікації в БД, затримка перехоплення прострочених чужих підписок,
+# період перевірки прострочених чужих підписок і період опитування маркерів змін розкладу
+PUBLISH_WORKERS = int(get_env_variable("PUBLISH_WORKERS", 1))
+PUBLISH_LEASE_SECONDS = int(get_env_variable("PUBLISH_LEASE_SECONDS", 900))
+SHARD_TAKEOVER_SECONDS = int(get_env_variable("SHARD_TAKEOVER_SECONDS", 300))
+SHARD_TAKEOVER_CHECK_SECONDS = int(get_env_variable("SHARD_TAKEOVER_CHECK_SECONDS", 60))
+SCHEDULE_CHANGES_POLL_SECONDS = int(get_env_variable("SCHEDULE_CHANGES_POLL_SECONDS", 5))
+# Порт /metrics першого воркера (далі +1 на кожен воркер); 0 - не запускати сервер метрик у воркерах
+WORKER_METRICS_PORT = int(get_env_variable("WORKER_METRICS_PORT", 0))
+
+# Outbox публікацій: максимальна кількість спроб відправлення, експоненційна затримка між спробами,
+# тривалість оренди запису та максимальний інтервал опитування таблиці
+OUTBOX_MAX_ATTEMPTS = int(get_env_variable("OUTBOX_MAX_ATTEMPTS", 5))
+OUTBOX_BACKOFF_SECONDS = int(get_env_variable("OUTBOX_BACKOFF_SECONDS", 30))
+OUTBOX_BACKOFF_MAX_SECONDS = int(get_env_variable("OUTBOX_BACKOFF_MAX_SECONDS", 3600))
+OUTBOX_LEASE_SECONDS = int(get_env_variable("OUTBOX_LEASE_SECONDS", 300))
+OUTBOX_POLL_SECONDS = int(get_env_variable("OUTBOX_POLL_SECONDS", 60))
+
+# Ліміти відправлення в Telegram: повідомлень за секунду на бота (ділиться між PUBLISH_WORKERS процесами),
+# повідомлень за хвилину в один чат,
+# допустимий сплеск для чату і кількість повторів після TelegramRetryAfter
+TELEGRAM_GLOBAL_RATE = int(get_env_variable("TELEGRAM_GLOBAL_RATE", 30))
+TELEGRAM_CHAT_PER_MINUTE = int(get_env_variable("TELEGRAM_CHAT_PER_MINUTE", 20))
+TELEGRAM_CHAT_BURST = int(get_env_variable("TELEGRAM_CHAT_BURST", 5))
+TELEGRAM_RETRY_ATTEMPTS = int(get_env_variable("TELEGRAM_RETRY_ATTEMPTS", 3))
+
+# Спільний HTTP-клієнт: загальний ліміт з'єднань, ліміт на один хост, час кешування DNS,
+# час утримання keep-alive з'єднань і загальний таймаут запиту (секунди)
+HTTP_POOL_LIMIT = int(get_env_variable("HTTP_POOL_LIMIT", 100))
+HTTP_POOL_PER_HOST = int(get_env_variable("HTTP_POOL_PER_HOST", 10))
+HTTP_DNS_CACHE_SECONDS = int(get_env_variable("HTTP_DNS_CACHE_SECONDS", 300))
+HTTP_KEEPALIVE_SECONDS = int(get_env_variable("HTTP_KEEPALIVE_SECONDS", 30))
+HTTP_TIMEOUT_SECONDS = int(get_env_variable("HTTP_TIMEOUT_SECONDS", 30))
+
+# Кеш відповідей Bing: час життя запису (секунди), файл SQLite другого рівня та розмір кешу в пам'яті
+BING_CACHE_TTL_SECONDS = int(get_env_variable("BING_CACHE_TTL_SECONDS", 1800))
+RESPONSE_CACHE_PATH = get_env_variable("RESPONSE_CACHE_PATH", "response_cache.db")
+RESPONSE_CACHE_MEMORY_ITEMS = int(get_env_variable("RESPONSE_CACHE_MEMORY_ITEMS", 1024))
+
+# Кеш відповідей LLM (переклади і класифікація статей): час життя запису (секунди)
+# та максимальна кількість записів у SQLite
+SUMMARY_CACHE_TTL_SECONDS = int(get_env_variable("SUMMARY_CACHE_TTL_SECONDS", 3600 * 24 * 3))
+SUMMARY_CACHE_MAX_ITEMS = int(get_env_variable("SUMMARY_CACHE_MAX_ITEMS", 20_000))
+
+# Ключі Bing: кількість невдач поспіль до розмикання запобіжника, час до пробного запиту (секунди)
+# та пауза для ключа після відмови 401/403 (вичерпана квота)
+BING_BREAKER_FAILURES = int(get_env_variable("BING_BREAKER_FAILURES", 5))
+BING_BREAKER_RECOVERY_SECONDS = int(get_env_variable("BING_BREAKER_RECOVERY_SECONDS", 60))
+BING_KEY_COOLDOWN_SECONDS = int(get_env_variable("BING_KEY_COOLDOWN_SECONDS", 600))
+
+# Скільки кандидатів новин класифікувати одним запитом до LLM при виборі статті для каналу
+CLASSIFY_TOP_K = int(get_env_variable("CLASSIFY_TOP_K", 3))
+
+# Дедуплікація опублікованих статей: час життя запису, розмір часового кошика (секунди)
+# та максимальна кількість записів у пам'яті процесу
+DEDUP_TTL_SECONDS = int(get_env_variable("DEDUP_TTL_SECONDS", 3600 * 12))
+DEDUP_BUCKET_SECONDS = int(get_env_variable("DEDUP_BUCKET_SECONDS", 900))
+DEDUP_MAX_ITEMS = int(get_env_variable("DEDUP_MAX_ITEMS", 100_000))
+
+# Пошук майже однакових історій: максимальна відстань Геммінга між 64-бітними SimHash-підписами,
+# вікно часу (секунди) та максимальна кількість підписів у пам'яті процесу
+NEAR_DUPLICATE_DISTANCE = int(get_env_variable("NEAR_DUPLICATE_DISTANCE", 6))
+NEAR_DUPLICATE_WINDOW_SECONDS = int(get_env_variable("NEAR_DUPLICATE_WINDOW_SECONDS", 3600 * 12))
+NEAR_DUPLICATE_MAX_ITEMS = int(get_env_variable("NEAR_DUPLICATE_MAX_ITEMS", 50_000))
+
+# Azure OpenAI: ключ, ендпоінт, версія API, назва розгортання моделі,
+# таймаут одного запиту (секунди), кількість повторів після 429/збоїв і кількість keep-alive з'єднань
+AZURE_OPENAI_API_KEY = os.getenv("AZURE_OPENAI_API_KEY")
+AZURE_OPENAI_ENDPOINT = os.getenv("AZURE_OPENAI_ENDPOINT")
+AZURE_OPENAI_API_VERSION = get_env_variable("AZURE_OPENAI_API_VERSION", "2024-02-01")
+LLM_DEPLOYMENT = get_env_variable("LLM_DEPLOYMENT", "talex-mode")
+LLM_TIMEOUT_SECONDS = int(get_env_variable("LLM_TIMEOUT_SECONDS", 60))
+LLM_MAX_RETRIES = int(get_env_variable("LLM_MAX_RETRIES", 3))
+LLM_MAX_CONNECTIONS = int(get_env_variable("LLM_MAX_CONNECTIONS", 20))
+
+# Запасний переклад Google Translate: кількість потоків, таймаут одного перекладу (секунди)
+# та розмір LRU-кешу перекладів
+TRANSLATE_FALLBACK_WORKERS = int(get_env_variable("TRANSLATE_FALLBACK_WORKERS", 2))
+TRANSLATE_FALLBACK_TIMEOUT_SECONDS = int(get_env_variable("TRANSLATE_FALLBACK_TIMEOUT_SECONDS", 15))
+TRANSLATE_FALLBACK_CACHE_ITEMS = int(get_env_variable("TRANSLATE_FALLBACK_CACHE_ITEMS", 2048))
+
+# Приблизна максимальна кількість токенів тексту статті, що надсилається в LLM
+LLM_INPUT_TOKEN_BUDGET = int(get_env_variable("LLM_INPUT_TOKEN_BUDGET", 3000))
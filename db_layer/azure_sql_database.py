@@ -119,6 +119,75 @@ class AzureSQLDatabase(AbstractDatabase):
                     FOREIGN KEY (sub_id) REFERENCES News(id) ON DELETE CASCADE
                 );
             END;
+            ''',
+            '''
+            IF NOT EXISTS (SELECT * FROM sys.tables WHERE name = 'Publish_lease')
+            BEGIN
+                CREATE TABLE Publish_lease (
+                    sub_id INT PRIMARY KEY,
+                    worker_id NVARCHAR(255) NOT NULL DEFAULT '',
+                    due_at NVARCHAR(255) NOT NULL DEFAULT '',
+                    lease_until NVARCHAR(255) NOT NULL DEFAULT '',
+                    done INT NOT NULL DEFAULT 1,
+                    FOREIGN KEY (sub_id) REFERENCES News(id) ON DELETE CASCADE
+                );
+            END;
+            ''',
+            '''
+            IF NOT EXISTS (SELECT * FROM sys.tables WHERE name = 'Publish_outbox')
+            BEGIN
+                CREATE TABLE Publish_outbox (
+                    id INT IDENTITY(1,1) PRIMARY KEY,
+                    sub_ids NVARCHAR(255) NOT NULL,
+                    channel_name NVARCHAR(255) NOT NULL,
+                    user_id NVARCHAR(255) NOT NULL,
+                    news_type NVARCHAR(255) NOT NULL,
+                    payload NVARCHAR(MAX) NOT NULL,
+                    status NVARCHAR(15) NOT NULL DEFAULT 'pending',
+                    attempts INT NOT NULL DEFAULT 0,
+                    next_attempt_at NVARCHAR(255) NOT NULL,
+                    worker_id NVARCHAR(255) NOT NULL DEFAULT '',
+                    lease_until NVARCHAR(255) NOT NULL DEFAULT '',
+                    last_error NVARCHAR(MAX) NOT NULL DEFAULT '',
+                    created_at NVARCHAR(255) NOT NULL,
+                    due_at NVARCHAR(255) NOT NULL DEFAULT ''
+                );
+            END;
+            ''',
+            '''
+            IF NOT EXISTS (SELECT * FROM sys.tables WHERE name = 'Published_links')
+            BEGIN
+                CREATE TABLE Published_links (
+                    url_hash NVARCHAR(64) NOT NULL,
+                    channel_name NVARCHAR(255) NOT NULL,
+                    published_at NVARCHAR(255) NOT NULL,
+                    PRIMARY KEY (url_hash, channel_name)
+                );
+                CREATE INDEX idx_published_links_published_at ON Published_links (published_at);
+            END;
+            ''',
+            '''
+            IF NOT EXISTS (SELECT * FROM sys.tables WHERE name = 'Schedule_changes')
+            BEGIN
+                CREATE TABLE Schedule_changes (
+                    id INT IDENTITY(1,1) PRIMARY KEY,
+                    sub_id INT NOT NULL,
+                    changed_at NVARCHAR(255) NOT NULL
+                );
+            END;
+            ''',
+            '''
+            IF NOT EXISTS (SELECT * FROM sys.tables WHERE name = 'Query_profile')
+            BEGIN
+                CREATE TABLE Query_profile (
+                    sub_id INT PRIMARY KEY,
+                    query NVARCHAR(MAX) NOT NULL,
+                    language NVARCHAR(255) NOT NULL,
+                    region NVARCHAR(255) NOT NULL,
+                    is_category INT NOT NULL DEFAULT 0,
+                    FOREIGN KEY (sub_id) REFERENCES News(id) ON DELETE CASCADE
+                );
+            END;
             '''
         ]
 
@@ -99,5 +99,59 @@ class MySQLDatabase(AbstractDatabase):
                 FOREIGN KEY (sub_id) REFERENCES News(id) ON DELETE CASCADE
             )
             ''')
+            await self.execute('''
+            CREATE TABLE IF NOT EXISTS Publish_lease (
+                sub_id INT PRIMARY KEY,
+                worker_id VARCHAR(255) NOT NULL DEFAULT '',
+                due_at VARCHAR(255) NOT NULL DEFAULT '',
+                lease_until VARCHAR(255) NOT NULL DEFAULT '',
+                done TINYINT NOT NULL DEFAULT 1,
+                FOREIGN KEY (sub_id) REFERENCES News(id) ON DELETE CASCADE
+            )
+            ''')
+            await self.execute('''
+            CREATE TABLE IF NOT EXISTS Publish_outbox (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                sub_ids VARCHAR(255) NOT NULL,
+                channel_name VARCHAR(255) NOT NULL,
+                user_id VARCHAR(255) NOT NULL,
+                news_type VARCHAR(255) NOT NULL,
+                payload TEXT NOT NULL,
+                status VARCHAR(15) NOT NULL DEFAULT 'pending',
+                attempts INT NOT NULL DEFAULT 0,
+                next_attempt_at VARCHAR(255) NOT NULL,
+                worker_id VARCHAR(255) NOT NULL DEFAULT '',
+                lease_until VARCHAR(255) NOT NULL DEFAULT '',
+                last_error TEXT NOT NULL,
+                created_at VARCHAR(255) NOT NULL,
+                due_at VARCHAR(255) NOT NULL DEFAULT ''
+            )
+            ''')
+            await self.execute('''
+            CREATE TABLE IF NOT EXISTS Published_links (
+                url_hash VARCHAR(64) NOT NULL,
+                channel_name VARCHAR(255) NOT NULL,
+                published_at VARCHAR(255) NOT NULL,
+                PRIMARY KEY (url_hash, channel_name),
+                INDEX idx_published_links_published_at (published_at)
+            )
+            ''')
+            await self.execute('''
+            CREATE TABLE IF NOT EXISTS Schedule_changes (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                sub_id INT NOT NULL,
+                changed_at VARCHAR(255) NOT NULL
+            )
+            ''')
+            await self.execute('''
+            CREATE TABLE IF NOT EXISTS Query_profile (
+                sub_id INT PRIMARY KEY,
+                query VARCHAR(255) NOT NULL,
+                language VARCHAR(255) NOT NULL,
+                region VARCHAR(255) NOT NULL,
+                is_category TINYINT NOT NULL DEFAULT 0,
+                FOREIGN KEY (sub_id) REFERENCES News(id) ON DELETE CASCADE
+            )
+            ''')
         except Exception as e:
             logging.error(f"Ошибка создания таблиц в MySQL: {e}")
@@ -7,6 +7,9 @@ from datetime import datetime, timedelta
 
 logging.basicConfig(level=logging.INFO)
 
+# Максимальна кількість ID в одному запиті get_publishing_schedules(sub_ids=...)
+SCHEDULES_BATCH_SIZE = 500
+
 
 class SQLDataService:
     """Сервіс для роботи з даними в базі даних."""
@@ -275,30 +278,362 @@ class SQLDataService:
             logging.error(f"Помилка виконання запиту: {e}")
             raise
 
+    @staticmethod
+    def _publishing_row_to_dict(row) -> dict:
+        return {
+            'id': row[0],
+            'topic_name': row[1],
+            'channel_name': row[2],
+            'user_id': row[3],
+            'publish_frequency': row[4],
+            'news_type': row[5],
+            'add_poll': row[6],
+            'poll_text': row[7],
+            'is_active': row[8],
+            'last_pub_time': row[9],
+            'language_code': row[10]
+        }
+
     async def get_channels_for_publishing(self):
         """Отримує всі канали для публікації новин, якщо остання публікація була понад годину тому."""
         channels = await self.db.fetchall('''
             SELECT id, topic_name, channel_name, user_id, publish_frequency, 
-                   news_type, add_poll, poll_text, is_active, last_pub_time
+                   news_type, add_poll, poll_text, is_active, last_pub_time, language_code
             FROM News
         ''')
 
+        return [self._publishing_row_to_dict(row) for row in channels]
+
+    async def get_publishing_schedules(self, sub_id=None, shard_index: int = 0, shard_count: int = 1,
+                                       sub_ids: list | None = None):
+        """
+        Отримує активні підписки разом з правилами розкладу одним запитом (News + Publish_date + Publish_time).
+        Повертає записи у форматі get_channels_for_publishing з додатковими полями
+        'pub_dates' (список дат), 'pub_times' (словник {pub_time: sended}) та 'query_profile'
+        (збережений профіль запиту теми (query, language, region, is_category) або None, див. save_query_profile).
+        Якщо передано sub_id, повертає лише цю підписку (порожній список, якщо вона неактивна).
+        Якщо передано sub_ids, повертає активні підписки з цього списку одним запитом на кожні
+        SCHEDULES_BATCH_SIZE ID (неактивних і видалених у результаті немає).
+        Якщо shard_count > 1, повертає лише підписки шарду id % shard_count == shard_index.
+        """
+        query = '''
+            SELECT n.id, n.topic_name, n.channel_name, n.user_id, n.publish_frequency,
+                   n.news_type, n.add_poll, n.poll_text, n.is_active, n.last_pub_time, n.language_code,
+                   d.pub_time, t.pub_time, t.sended, q.query, q.language, q.region, q.is_category
+            FROM News n
+            LEFT JOIN Publish_date d ON d.sub_id = n.id
+            LEFT JOIN Publish_time t ON t.sub_id = n.id
+            LEFT JOIN Query_profile q ON q.sub_id = n.id
+            WHERE n.is_active = 'yes'
+        '''
+        if sub_ids is not None:
+            sub_ids = list(dict.fromkeys(sub_ids))
+            rows = []
+            for start in range(0, len(sub_ids), SCHEDULES_BATCH_SIZE):
+                batch = sub_ids[start:start + SCHEDULES_BATCH_SIZE]
+                rows += await self.db.fetchall(f"{query} AND n.id IN ({', '.join('?' * len(batch))})",
+                                               tuple(batch)) or []
+            return self._schedules_from_rows(rows)
+
+        params = ()
+        if sub_id is not None:
+            query += ' AND n.id = ?'
+            params = (sub_id,)
+        elif shard_count > 1:
+            query += ' AND n.id % ? = ?'
+            params = (shard_count, shard_index)
+
+        rows = await self.db.fetchall(query, params) or []
+        return self._schedules_from_rows(rows)
+
+    def _schedules_from_rows(self, rows) -> list:
+        """Збирає рядки News + Publish_date + Publish_time + Query_profile у записи підписок."""
+        subscriptions = {}
+        for row in rows:
+            item = subscriptions.get(row[0])
+            if item is None:
+                item = subscriptions[row[0]] = self._publishing_row_to_dict(row)
+                item['pub_dates'] = []
+                item['pub_times'] = {}
+                item['query_profile'] = (row[14], row[15], row[16], bool(row[17])) if row[14] is not None else None
+            pub_date, pub_time, sended = row[11], row[12], row[13]
+            if pub_date is not None and pub_date not in item['pub_dates']:
+                item['pub_dates'].append(pub_date)
+            if pub_time is not None:
+                item['pub_times'][pub_time] = sended
+
+        return list(subscriptions.values())
+
+    async def save_query_profile(self, sub_id, query: str, language: str, region: str, is_category: bool):
+        """Зберігає профіль запиту теми підписки, щоб мову не визначати заново після перезапуску чи в іншому воркері."""
+        try:
+            await self.db.execute('''
+                DELETE FROM Query_profile
+                WHERE sub_id = ?
+            ''', (sub_id,))
+            await self.db.execute('''
+                INSERT INTO Query_profile (sub_id, query, language, region, is_category)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (sub_id, query, language, region, int(is_category)))
+        except Exception as e:
+            logging.error(f"Помилка збереження профілю запиту підписки {sub_id}: {e}")
+
+    async def get_overdue_subscription_ids(self, shard_index: int, shard_count: int,
+                                           interval_deadlines: dict, slot_deadline: str) -> list:
+        """
+        Повертає ID активних підписок чужих шардів (id % shard_count <> shard_index), публікація яких прострочена.
+        interval_deadlines - {правило інтервалу: last_pub_time (UTC)}: підписка з правилом прострочена,
+        якщо остання публікація не пізніше цього часу.
+        slot_deadline - 'HH:MM': фіксований час не пізніше нього, ще не відправлений сьогодні, прострочений.
+        Результат - кандидати: остаточне рішення приймає планувальник за повним розкладом.
+        """
+        conditions = ["(t.pub_time NOT LIKE 'every%' AND t.sended = 0 AND t.pub_time <= ?)"]
+        params = [shard_count, shard_index, slot_deadline]
+        for rule, deadline in interval_deadlines.items():
+            conditions.append('(t.pub_time = ? AND n.last_pub_time <= ?)')
+            params.extend((rule, deadline))
+
+        rows = await self.db.fetchall(f'''
+            SELECT DISTINCT n.id
+            FROM News n
+            JOIN Publish_time t ON t.sub_id = n.id
+            WHERE n.is_active = 'yes' AND n.id % ? <> ?
+              AND ({' OR '.join(conditions)})
+        ''', tuple(params)) or []
+
+        return [row[0] for row in rows]
+
+    async def add_schedule_change(self, sub_id: int, keep_hours: int = 24):
+        """
+        Записує маркер зміни розкладу підписки для воркерів в інших процесах (sub_id = 0 - змінено все).
+        Маркери, старші за keep_hours, видаляються.
+        """
+        now = self._get_last_published_time()
+        try:
+            await self.db.execute('''
+                INSERT INTO Schedule_changes (sub_id, changed_at)
+                VALUES (?, ?)
+            ''', (sub_id, now))
+            await self.db.execute('''
+                DELETE FROM Schedule_changes
+                WHERE changed_at < ?
+            ''', (self._get_last_published_time(-keep_hours),))
+        except Exception as e:
+            logging.error(f"Помилка запису зміни розкладу підписки {sub_id}: {e}")
+
+    async def get_schedule_changes(self, after_id: int) -> list:
+        """Повертає маркери змін розкладу з id > after_id як пари (id, sub_id) у порядку запису."""
+        rows = await self.db.fetchall('''
+            SELECT id, sub_id
+            FROM Schedule_changes
+            WHERE id > ?
+            ORDER BY id
+        ''', (after_id,)) or []
+
+        return [(row[0], row[1]) for row in rows]
+
+    async def get_last_schedule_change_id(self) -> int:
+        """Повертає id останнього маркера змін розкладу (0, якщо маркерів немає)."""
+        row = await self.db.fetchone('''
+            SELECT MAX(id)
+            FROM Schedule_changes
+        ''')
+
+        return row[0] if row and row[0] is not None else 0
+
+    async def claim_publication(self, sub_id, due_at: str, worker_id: str, lease_seconds: int) -> bool:
+        """
+        Атомарно захоплює публікацію підписки за моментом due_at для воркера worker_id.
+        Повертає True, якщо цю публікацію має виконати саме цей воркер.
+        Захоплення неможливе, якщо публікацію за due_at вже виконано або її тримає інший воркер,
+        оренда якого ще не сплила (оренда впалого воркера перехоплюється після lease_until).
+        """
+        now = self._get_last_published_time()
+        lease_until = (datetime.utcnow() + timedelta(seconds=lease_seconds)).strftime('%Y-%m-%d %H:%M:%S')
+
+        try:
+            # Гарантуємо наявність рядка оренди для підписки
+            await self.db.execute('''
+                INSERT INTO Publish_lease (sub_id, worker_id, due_at, lease_until, done)
+                SELECT id, '', '', '', 1
+                FROM News
+                WHERE id = ? AND id NOT IN (SELECT sub_id FROM Publish_lease)
+            ''', (sub_id,))
+
+            await self.db.execute('''
+                UPDATE Publish_lease
+                SET worker_id = ?, due_at = ?, lease_until = ?, done = 0
+                WHERE sub_id = ?
+                  AND ((done = 1 AND due_at <> ?) OR (done = 0 AND lease_until < ?))
+            ''', (worker_id, due_at, lease_until, sub_id, due_at, now))
+
+            lease = await self.db.fetchone('''
+                SELECT worker_id, due_at, done
+                FROM Publish_lease
+                WHERE sub_id = ?
+            ''', (sub_id,))
+        except Exception as e:
+            logging.error(f"Помилка захоплення публікації підписки {sub_id}: {e}")
+            return False
+
+        return bool(lease) and lease[0] == worker_id and lease[1] == due_at and lease[2] == 0
+
+    async def release_publication(self, sub_id, due_at: str, worker_id: str):
+        """Позначає захоплену публікацію як виконану (лише після успішної публікації, див. abandon_publication)."""
+        try:
+            await self.db.execute('''
+                UPDATE Publish_lease
+                SET done = 1
+                WHERE sub_id = ? AND worker_id = ? AND due_at = ?
+            ''', (sub_id, worker_id, due_at))
+        except Exception as e:
+            logging.error(f"Помилка звільнення оренди підписки {sub_id}: {e}")
+
+    async def abandon_publication(self, sub_id, due_at: str, worker_id: str):
+        """
+        Знімає оренду невдалої публікації без позначки виконання: done = 0 і порожній lease_until
+        (оренда вже сплила), тому наступне захоплення з тим самим due_at (повторна спроба) знову можливе.
+        """
+        try:
+            await self.db.execute('''
+                UPDATE Publish_lease
+                SET done = 0, lease_until = ''
+                WHERE sub_id = ? AND worker_id = ? AND due_at = ?
+            ''', (sub_id, worker_id, due_at))
+        except Exception as e:
+            logging.error(f"Помилка зняття оренди підписки {sub_id}: {e}")
+
+    async def enqueue_publication(self, sub_ids: list, channel_name, user_id, news_type, payload: str,
+                                  due_at: str = ''):
+        """
+        Додає готовий до відправлення контент у таблицю Publish_outbox.
+        due_at - запланований час публікації (UTC), від якого рахується запізнення відправлення.
+        """
+        now = self._get_last_published_time()
+        try:
+            return await self.db.execute('''
+                INSERT INTO Publish_outbox (sub_ids, channel_name, user_id, news_type, payload,
+                                            status, attempts, next_attempt_at, last_error, created_at, due_at)
+                VALUES (?, ?, ?, ?, ?, 'pending', 0, ?, '', ?, ?)
+            ''', (','.join(str(sub_id) for sub_id in sub_ids), channel_name, str(user_id), news_type, payload,
+                  now, now, due_at or ''))
+        except Exception as e:
+            logging.error(f"Помилка додавання публікації в outbox: {e}")
+            raise
+
+    async def get_ready_publications(self):
+        """Повертає записи outbox, готові до відправлення (включно з тими, чия оренда сплила)."""
+        now = self._get_last_published_time()
+        rows = await self.db.fetchall('''
+            SELECT id, sub_ids, channel_name, user_id, news_type, payload, attempts, created_at, due_at
+            FROM Publish_outbox
+            WHERE (status = 'pending' AND next_attempt_at <= ?)
+               OR (status = 'sending' AND lease_until < ?)
+            ORDER BY id
+        ''', (now, now)) or []
+
         return [
             {
                 'id': row[0],
-                'topic_name': row[1],
+                'sub_ids': [int(sub_id) for sub_id in row[1].split(',') if sub_id],
                 'channel_name': row[2],
                 'user_id': row[3],
-                'publish_frequency': row[4],
-                'news_type': row[5],
-                'add_poll': row[6],
-                'poll_text': row[7],
-                'is_active': row[8],
-                'last_pub_time': row[9]
+                'news_type': row[4],
+                'payload': row[5],
+                'attempts': row[6],
+                'created_at': row[7],
+                'due_at': row[8]
             }
-            for row in channels
+            for row in rows
         ]
 
+    async def get_next_publication_attempt(self):
+        """Повертає найближчий час повторної спроби відправлення (UTC, рядок) або None."""
+        row = await self.db.fetchone('''
+            SELECT MIN(next_attempt_at)
+            FROM Publish_outbox
+            WHERE status = 'pending'
+        ''')
+        return row[0] if row else None
+
+    async def claim_outbox_publication(self, outbox_id, worker_id: str, lease_seconds: int) -> bool:
+        """Атомарно захоплює запис outbox для відправлення воркером worker_id."""
+        now = self._get_last_published_time()
+        lease_until = (datetime.utcnow() + timedelta(seconds=lease_seconds)).strftime('%Y-%m-%d %H:%M:%S')
+        try:
+            await self.db.execute('''
+                UPDATE Publish_outbox
+                SET status = 'sending', worker_id = ?, lease_until = ?
+                WHERE id = ?
+                  AND ((status = 'pending' AND next_attempt_at <= ?) OR (status = 'sending' AND lease_until < ?))
+            ''', (worker_id, lease_until, outbox_id, now, now))
+            row = await self.db.fetchone('''
+                SELECT worker_id, status, lease_until
+                FROM Publish_outbox
+                WHERE id = ?
+            ''', (outbox_id,))
+        except Exception as e:
+            logging.error(f"Помилка захоплення запису outbox {outbox_id}: {e}")
+            return False
+
+        return bool(row) and row[0] == worker_id and row[1] == 'sending' and row[2] == lease_until
+
+    async def mark_publication_sent(self, outbox_id):
+        await self.db.execute('''
+            UPDATE Publish_outbox
+            SET status = 'sent', last_error = ''
+            WHERE id = ?
+        ''', (outbox_id,))
+
+    async def mark_publication_failed(self, outbox_id, attempts: int, retry_in_seconds: float | None, error: str):
+        """
+        Фіксує невдалу спробу відправлення.
+        Якщо retry_in_seconds дорівнює None, запис переходить у стан 'dead' і більше не відправляється.
+        """
+        if retry_in_seconds is None:
+            status, next_attempt_at = 'dead', self._get_last_published_time()
+        else:
+            status = 'pending'
+            next_attempt_at = (datetime.utcnow() + timedelta(seconds=retry_in_seconds)).strftime('%Y-%m-%d %H:%M:%S')
+        await self.db.execute('''
+            UPDATE Publish_outbox
+            SET status = ?, attempts = ?, next_attempt_at = ?, last_error = ?
+            WHERE id = ?
+        ''', (status, attempts, next_attempt_at, error[:1000], outbox_id))
+
+    async def add_published_link(self, url_hash: str, channel_name: str, published_at: str):
+        """Запам'ятовує, що стаття (хеш URL) вже публікувалась у каналі."""
+        try:
+            await self.db.execute('''
+                DELETE FROM Published_links
+                WHERE url_hash = ? AND channel_name = ?
+            ''', (url_hash, channel_name))
+            await self.db.execute('''
+                INSERT INTO Published_links (url_hash, channel_name, published_at)
+                VALUES (?, ?, ?)
+            ''', (url_hash, channel_name, published_at))
+        except Exception as e:
+            logging.error(f"Помилка збереження опублікованого посилання для {channel_name}: {e}")
+
+    async def get_published_links(self, url_hashes: list, channel_name: str, since: str) -> set:
+        """Повертає ті хеші з url_hashes, що публікувались у каналі після since (UTC)."""
+        if not url_hashes:
+            return set()
+        placeholders = ', '.join('?' for _ in url_hashes)
+        rows = await self.db.fetchall(f'''
+            SELECT url_hash
+            FROM Published_links
+            WHERE channel_name = ? AND published_at > ? AND url_hash IN ({placeholders})
+        ''', (channel_name, since, *url_hashes)) or []
+        return {row[0] for row in rows}
+
+    async def delete_published_links_before(self, before: str):
+        """Видаляє записи про публікації, старші за before (UTC)."""
+        await self.db.execute('''
+            DELETE FROM Published_links
+            WHERE published_at <= ?
+        ''', (before,))
+
     async def get_last_times_list(self):
         result = await self.db.fetchall('''
             SELECT last_pub_time, topic_name
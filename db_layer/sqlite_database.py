@@ -74,5 +74,61 @@ class SQLiteDatabase(AbstractDatabase):
             FOREIGN KEY (sub_id) REFERENCES News(id) ON DELETE CASCADE
         )
         ''')
+        await self.execute('''
+        CREATE TABLE IF NOT EXISTS Publish_lease (
+            sub_id INTEGER PRIMARY KEY,
+            worker_id TEXT NOT NULL DEFAULT '',
+            due_at TEXT NOT NULL DEFAULT '',
+            lease_until TEXT NOT NULL DEFAULT '',
+            done INTEGER NOT NULL DEFAULT 1,
+            FOREIGN KEY (sub_id) REFERENCES News(id) ON DELETE CASCADE
+        )
+        ''')
+        await self.execute('''
+        CREATE TABLE IF NOT EXISTS Publish_outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            sub_ids TEXT NOT NULL,
+            channel_name TEXT NOT NULL,
+            user_id TEXT NOT NULL,
+            news_type TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at TEXT NOT NULL,
+            worker_id TEXT NOT NULL DEFAULT '',
+            lease_until TEXT NOT NULL DEFAULT '',
+            last_error TEXT NOT NULL DEFAULT '',
+            created_at TEXT NOT NULL,
+            due_at TEXT NOT NULL DEFAULT ''
+        )
+        ''')
+        await self.execute('''
+        CREATE TABLE IF NOT EXISTS Published_links (
+            url_hash TEXT NOT NULL,
+            channel_name TEXT NOT NULL,
+            published_at TEXT NOT NULL,
+            PRIMARY KEY (url_hash, channel_name)
+        )
+        ''')
+        await self.execute('''
+        CREATE INDEX IF NOT EXISTS idx_published_links_published_at ON Published_links (published_at)
+        ''')
+        await self.execute('''
+        CREATE TABLE IF NOT EXISTS Schedule_changes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            sub_id INTEGER NOT NULL,
+            changed_at TEXT NOT NULL
+        )
+        ''')
+        await self.execute('''
+        CREATE TABLE IF NOT EXISTS Query_profile (
+            sub_id INTEGER PRIMARY KEY,
+            query TEXT NOT NULL,
+            language TEXT NOT NULL,
+            region TEXT NOT NULL,
+            is_category INTEGER NOT NULL DEFAULT 0,
+            FOREIGN KEY (sub_id) REFERENCES News(id) ON DELETE CASCADE
+        )
+        ''')
 
 
@@ -1,8 +1,4 @@
-import asyncio
 import logging
-import threading
-from concurrent.futures import ThreadPoolExecutor
-from datetime import datetime
 
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
@@ -12,9 +8,17 @@ from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_applicati
 from aiohttp import web
 
 from bot_router_aiogram_dialog import register_routes
-from config import BOT_TOKEN, BASE_WEBHOOK_URL, WEB_SERVER_HOST, WEB_SERVER_PORT, WEBHOOK_PATH, WEBHOOK_SECRET
+from config import (BOT_TOKEN, BASE_WEBHOOK_URL, WEB_SERVER_HOST, WEB_SERVER_PORT, WEBHOOK_PATH, WEBHOOK_SECRET,
+                    PUBLISH_WORKERS)
 from db_layer.db_factory import get_data_serice
-from news_processing.news_pre_publisher import time_check
+from news_processing.fallback_translator import fallback_translator
+from news_processing.http_client import http_client
+from news_processing.llm_gateway import llm_gateway
+from news_processing.metrics import metrics_handler
+from news_processing.outbox import outbox_sender
+from news_processing.response_cache import cache_connections
+from news_processing.scheduler import scheduler
+from news_worker import start_workers, stop_workers
 
 
 async def set_bot_commands(bot: Bot):
@@ -42,48 +46,30 @@ async def on_startup(app: web.Application):
     # Установка команд для бота
     await set_bot_commands(app["bot"])
 
+    async with get_data_serice() as db:
+        await db.create_db()
+
+    # Запуск планувальника публікацій у тому ж event loop, зі спільним екземпляром Bot.
+    # Якщо налаштовано кілька воркерів, публікацією займаються окремі процеси (news_worker.py)
+    if PUBLISH_WORKERS <= 1:
+        await scheduler.start(app["bot"])
+        await outbox_sender.start(app["bot"])
+
     print("Webhook started")
 
 
 async def on_shutdown(app: web.Application):
     """Функція для зупинки Webhook"""
+    await scheduler.stop()
+    await outbox_sender.stop()
+    await http_client.close()
+    await cache_connections.close()
+    await llm_gateway.close()
+    fallback_translator.close()
+    logging.info("Finishing news processing...")
     await app["bot"].delete_webhook()
 
 
-stop_event = threading.Event()
-
-
-async def scheduled_news_publishing():
-    """
-    Функція для циклічної перевірки та публікації новин,
-    та оновлення статусу 'sended', якщо настав новий день.
-    """
-    try:
-        async with get_data_serice() as db:
-            await db.create_db()
-        bot = Bot(token=BOT_TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
-        last_checked_day = datetime.now().date()
-        while not stop_event.is_set():
-            current_day = datetime.now().date()
-
-            if current_day != last_checked_day:
-                async with get_data_serice() as db:
-                    await db.set_all_sended_status_false()
-
-                last_checked_day = current_day
-
-            await time_check(bot)
-            stop_event.wait(60)
-    except Exception as e:
-        logging.error(f"News processing error occurred: {e}")
-    finally:
-        logging.info("Finishing news processing...")
-
-
-def start_scheduled_news_publishing():
-    """Запуск функції публікації новин в окремому потоці."""
-    asyncio.run(scheduled_news_publishing())
-
 async def health_check(request):
     """
     Responds with HTTP 200 to indicate the app is healthy.
@@ -102,6 +88,7 @@ def main_bot():
         app.on_startup.append(on_startup)
         app.on_shutdown.append(on_shutdown)
         app.router.add_get("/health", health_check)
+        app.router.add_get("/metrics", metrics_handler)
 
         SimpleRequestHandler(dispatcher=dp, bot=bot).register(app, path=WEBHOOK_PATH)
         setup_application(app, dp, bot=bot)
@@ -117,8 +104,8 @@ def main_bot():
 
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
-    with ThreadPoolExecutor(max_workers=1) as executor:
-        # Запускаємо scheduled_news_publishing в окремому потоці
-        executor.submit(start_scheduled_news_publishing)
+    workers = start_workers(PUBLISH_WORKERS) if PUBLISH_WORKERS > 1 else []
+    try:
         main_bot()
-        stop_event.set()
+    finally:
+        stop_workers(workers)
@@ -0,0 +1,133 @@
+import json
+import re
+import time
+from pathlib import Path
+from urllib.parse import urlparse
+
+from news_processing.metrics import registry, Counter
+
+LLM_CALLS_AVOIDED_TOTAL = registry.register(Counter(
+    'news_llm_calls_avoided_total', 'Article classifications decided locally without an LLM call',
+    ('verdict', 'reason')))
+
+# Заклики завантажити застосунок, підписатися, купити тощо: такий сніпет - реклама, а не новина
+CALL_TO_ACTION_PATTERNS = re.compile(
+    r'(read|watch|listen|continue reading|get|download)\b[^.!?]{0,40}\b(our|the)\s+app\b|'
+    r'\bdownload\s+(the|our)\b|\bsubscribe\s+(now|today|to\s+our)\b|\bsign\s+up\s+(now|today|for\s+our)\b|'
+    r'\b(buy|order|shop)\s+now\b|\b(use|enter|apply)\s+(the\s+|our\s+)?(promo\s?code|coupon)\b|'
+    r'\bclick\s+here\s+to\s+(buy|order|get|save|claim|subscribe)\b|'
+    r'(завантажуйте|завантажте|встановлюйте|встановіть)\s+(наш|застосунок|додаток)|'
+    r'читайте\s+(нас|більше|новини)\s+(у|в)\s+'
+    r'(нашому|нашій|нашого|застосунку|додатку|telegram|телеграм|viber|вайбер)|'
+    r'(підписуйтес[ья]|підпишіться)\s+на\s+(наш|нашу|нас)|встигніть\s+(замовити|купити|придбати)|'
+    r'(скачивайте|скачайте)\s+(наше|приложение)|(подписывайтесь|подпишитесь)\s+на\s+(наш|нашу|нас|рассылку)|'
+    r'читайте\s+нас\s+в',
+    re.I)
+# Окремі рекламні слова трапляються і в новинах (розпродаж держмайна, позов щодо free trial),
+# тому сніпет вважається рекламою, лише якщо таких ознак кілька
+PROMO_SIGNALS = {
+    'sponsored': re.compile(r'\bsponsored\b', re.I),
+    'promo_code': re.compile(r'\bpromo\s?code\b|промокод', re.I),
+    'coupon': re.compile(r'\bcoupons?\b', re.I),
+    'free_trial': re.compile(r'\bfree\s+trial\b', re.I),
+    'limited_offer': re.compile(r'\blimited[-\s]time\s+offer\b|лише\s+цього\s+тижня|только\s+на\s+этой\s+неделе',
+                               re.I),
+    'click_here': re.compile(r'\bclick\s+here\b', re.I),
+    'discount': re.compile(r'\b(save|off)\s+up\s+to\b|\bup\s+to\s+\d+%\s+off\b|знижк[аиу]\s+до|скидк[аиу]\s+до', re.I),
+    'sale': re.compile(r'розпродаж|распродаж', re.I),
+    'advertising': re.compile(r'\bреклама\b', re.I),
+}
+# Кількість різних рекламних ознак, з якої сніпет вважається рекламою без перевірки LLM
+MIN_PROMO_SIGNALS = 2
+URL_PATTERN = re.compile(r'https?://\S+|www\.\S+', re.I)
+WORD_PATTERN = re.compile(r'[^\W\d_]{2,}')
+# Сторінки сайту, що не є окремою статтею: головна, теги, рубрики, автори, пошук, підписка, магазин
+NON_ARTICLE_PATH = re.compile(
+    r'^/?(index\.html?|home)?/?$|/(tags?|category|categories|topics?|search|authors?|subscribe|apps?|login|signup|'
+    r'register|shop|deals?|coupons?)(/|$)', re.I)
+# Типові адреси статей: дата в шляху, числовий ідентифікатор або довгий slug
+ARTICLE_PATH = re.compile(r'/\d{4}/\d{1,2}/|\d{5,}|[^/\s]+(?:-[^/\s]+){3,}|/(news|article|articles|story|stories)/',
+                          re.I)
+
+# Сніпети, коротші за це (символи), не містять новини
+MIN_SNIPPET_LENGTH = 40
+# Мінімальна кількість слів у сніпеті
+MIN_SNIPPET_WORDS = 6
+# Частка тексту, зайнята посиланнями, після якої сніпет вважається списком посилань
+MAX_LINK_RATIO = 0.5
+# Сніпет від цієї довжини зі статейною адресою і без реклами вважається новиною без перевірки LLM
+CONFIDENT_ARTICLE_LENGTH = 150
+CONFIDENT_ARTICLE_WORDS = 20
+
+
+def classify_candidate(text: str, url: str | None = None) -> tuple[str | None, str]:
+    """
+    Локальна класифікація кандидата новини за сніпетом і адресою.
+    Повертає ('True' | 'False', причина) для очевидних випадків або (None, 'ambiguous'),
+    якщо рішення має прийняти LLM.
+    """
+    text = (text or '').strip()
+    if not text:
+        return 'False', 'empty'
+
+    link_length = sum(len(link) for link in URL_PATTERN.findall(text))
+    if link_length / len(text) > MAX_LINK_RATIO:
+        return 'False', 'link_only'
+
+    words = WORD_PATTERN.findall(URL_PATTERN.sub(' ', text))
+    if len(text) < MIN_SNIPPET_LENGTH or len(words) < MIN_SNIPPET_WORDS:
+        return 'False', 'too_short'
+
+    if CALL_TO_ACTION_PATTERNS.search(text):
+        return 'False', 'promo'
+    if sum(1 for signal in PROMO_SIGNALS.values() if signal.search(text)) >= MIN_PROMO_SIGNALS:
+        return 'False', 'promo'
+
+    path = urlparse(url).path if url else ''
+    if url and NON_ARTICLE_PATH.search(path):
+        return 'False', 'non_article_url'
+
+    if (len(text) >= CONFIDENT_ARTICLE_LENGTH and len(words) >= CONFIDENT_ARTICLE_WORDS
+            and ARTICLE_PATH.search(path)):
+        return 'True', 'article'
+
+    return None, 'ambiguous'
+
+
+def prefilter(text: str, url: str | None = None) -> str | None:
+    """classify_candidate з обліком уникнутих викликів LLM; None - кандидата треба перевірити через LLM."""
+    verdict, reason = classify_candidate(text, url)
+    if verdict is not None:
+        LLM_CALLS_AVOIDED_TOTAL.inc(verdict=verdict, reason=reason)
+    return verdict
+
+
+# Бенчмарк точності та пропускної здатності на розмічених сніпетах з fixtures/candidates.jsonl
+if __name__ == "__main__":
+    fixtures = [json.loads(line) for line in
+                (Path(__file__).parent / 'fixtures' / 'candidates.jsonl').read_text(encoding='utf-8').splitlines()
+                if line.strip()]
+
+    decided = correct = 0
+    for fixture in fixtures:
+        verdict, reason = classify_candidate(fixture['general_text'], fixture['url'])
+        if verdict is None:
+            continue
+        decided += 1
+        if verdict == fixture['label']:
+            correct += 1
+        else:
+            print(f"mismatch ({reason}): expected {fixture['label']}, got {verdict}: {fixture['general_text'][:70]}")
+
+    rounds = 2_000
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for fixture in fixtures:
+            classify_candidate(fixture['general_text'], fixture['url'])
+    elapsed = time.perf_counter() - started
+
+    print(f"{len(fixtures)} labelled candidates")
+    print(f"decided locally (LLM calls avoided): {decided} ({decided / len(fixtures):.0%})")
+    print(f"accuracy of local decisions:          {correct / decided:.1%}" if decided else "no local decisions")
+    print(f"throughput: {rounds * len(fixtures) / elapsed:,.0f} candidates/s "
+          f"({elapsed / (rounds * len(fixtures)) * 1e6:.1f} us per candidate)")
@@ -0,0 +1,188 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from datetime import datetime
+
+import aiohttp
+
+from config import (BG_KEY_1, BG_KEY_2, BG_ENDPOINT, BGS_KEY_1, BGS_KEY_2, BGS_ENDPOINT,
+                    BING_BREAKER_FAILURES, BING_BREAKER_RECOVERY_SECONDS, BING_KEY_COOLDOWN_SECONDS)
+from news_processing.metrics import registry, Counter, Gauge
+
+BING_REQUESTS_TOTAL = registry.register(Counter(
+    'news_bing_requests_total', 'Bing API requests by key and outcome', ('key', 'outcome')))
+BING_BREAKER_OPEN = registry.register(Gauge(
+    'news_bing_breaker_open', 'Whether the Bing endpoint circuit breaker is open (1) or not (0)', ('endpoint',)))
+
+# Скільки останніх відповідей враховувати в частці помилок ключа
+ERROR_WINDOW = 50
+# Пауза для ключа після 429 без заголовка Retry-After (секунди)
+DEFAULT_RETRY_AFTER = 1
+
+
+class CircuitBreaker:
+    """
+    Запобіжник для ендпоінта: після failure_threshold невдач поспіль перестає пропускати запити
+    на recovery_seconds, потім пропускає один пробний запит (half-open).
+    Успішна проба закриває запобіжник, невдала - відкриває знову.
+    """
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self, name: str, failure_threshold: int, recovery_seconds: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_seconds = recovery_seconds
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+
+    def allow(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.recovery_seconds:
+            self.state = self.HALF_OPEN
+        if self.state == self.HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        return False
+
+    def record_success(self):
+        if self.state != self.CLOSED:
+            logging.info(f"Bing endpoint {self.name}: circuit breaker closed")
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probe_in_flight = False
+        BING_BREAKER_OPEN.set(0, endpoint=self.name)
+
+    def record_failure(self):
+        self.failures += 1
+        self._probe_in_flight = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logging.warning(f"Bing endpoint {self.name}: circuit breaker opened after {self.failures} failures")
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+            BING_BREAKER_OPEN.set(1, endpoint=self.name)
+
+    def release(self):
+        """Звільняє пробний слот, якщо запит не дійшов до ендпоінта (наприклад, усі ключі на паузі)."""
+        self._probe_in_flight = False
+
+
+class BingKey:
+    """Стан одного ключа: використання за добу (UTC), пауза після 429/403 і частка помилок."""
+
+    def __init__(self, name: str, value: str):
+        self.name = name
+        self.value = value
+        self.usage_day = None
+        self.usage = 0
+        self.paused_until = 0.0
+        self.results = deque(maxlen=ERROR_WINDOW)  # True - успіх, False - помилка
+
+    @property
+    def available(self) -> bool:
+        return bool(self.value) and self.paused_until <= time.monotonic()
+
+    @property
+    def error_rate(self) -> float:
+        return self.results.count(False) / len(self.results) if self.results else 0.0
+
+    def count_use(self):
+        today = datetime.utcnow().date()
+        if self.usage_day != today:
+            self.usage_day, self.usage = today, 0
+        self.usage += 1
+
+    def pause(self, seconds: float):
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+
+class BingKeyManager:
+    """
+    Розподіляє запити до одного ендпоінта Bing між ключами.
+    Обирається доступний ключ з найменшою часткою помилок і найменшим використанням за добу;
+    429 ставить ключ на паузу за Retry-After, 401/403 (вичерпана квота, невалідний ключ) - на
+    BING_KEY_COOLDOWN_SECONDS, після чого запит повторюється з наступним ключем.
+    Мережеві помилки та 5xx рахуються запобіжником ендпоінта, щоб тіки публікації не чекали мертвий сервіс.
+    """
+
+    def __init__(self, name: str, endpoint: str, keys: dict):
+        self.name = name
+        self.endpoint = endpoint
+        self.keys = [BingKey(key_name, value) for key_name, value in keys.items() if value]
+        self.breaker = CircuitBreaker(name, BING_BREAKER_FAILURES, BING_BREAKER_RECOVERY_SECONDS)
+
+    def _candidates(self) -> list[BingKey]:
+        return sorted((key for key in self.keys if key.available), key=lambda key: (key.error_rate, key.usage))
+
+    @staticmethod
+    def _retry_after(response: aiohttp.ClientResponse) -> float:
+        try:
+            return float(response.headers.get('Retry-After', DEFAULT_RETRY_AFTER))
+        except ValueError:
+            return DEFAULT_RETRY_AFTER
+
+    async def fetch(self, session: aiohttp.ClientSession, url: str) -> dict | None:
+        """Виконує GET до Bing і повертає JSON відповіді або None, якщо отримати дані не вдалося."""
+        if not self.breaker.allow():
+            BING_REQUESTS_TOTAL.inc(key=self.name, outcome='breaker_open')
+            return None
+
+        endpoint_failed = False
+        attempted = False
+        for key in self._candidates():
+            attempted = True
+            key.count_use()
+            try:
+                async with session.get(url, headers={'Ocp-Apim-Subscription-Key': key.value}) as response:
+                    status = response.status
+                    if status == 429:
+                        key.pause(self._retry_after(response))
+                        BING_REQUESTS_TOTAL.inc(key=key.name, outcome='throttled')
+                        continue
+                    if status in (401, 403):
+                        key.pause(BING_KEY_COOLDOWN_SECONDS)
+                        key.results.append(False)
+                        BING_REQUESTS_TOTAL.inc(key=key.name, outcome='rejected')
+                        logging.warning(f"Bing key {key.name} rejected with HTTP {status}, paused")
+                        continue
+                    if status >= 500:
+                        key.results.append(False)
+                        endpoint_failed = True
+                        BING_REQUESTS_TOTAL.inc(key=key.name, outcome='server_error')
+                        continue
+                    data = await response.json(content_type=None)
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                logging.warning(f"Bing request with key {key.name} failed: {e!r}")
+                key.results.append(False)
+                endpoint_failed = True
+                BING_REQUESTS_TOTAL.inc(key=key.name, outcome='network_error')
+                continue
+
+            key.results.append(True)
+            self.breaker.record_success()
+            BING_REQUESTS_TOTAL.inc(key=key.name, outcome='ok' if status == 200 else f'http_{status}')
+            return data if status == 200 else None
+
+        if endpoint_failed:
+            self.breaker.record_failure()
+        else:
+            # Усі ключі на паузі: ендпоінт здоровий, просто швидко відмовляємо
+            self.breaker.release()
+            if not attempted:
+                BING_REQUESTS_TOTAL.inc(key=self.name, outcome='no_key_available')
+        return None
+
+
+# Менеджери ключів для Bing News Search ('news') та Bing Web Search (усі інші типи пошуку)
+key_managers = {
+    'news': BingKeyManager('news', BG_ENDPOINT, {'BG_KEY_1': BG_KEY_1, 'BG_KEY_2': BG_KEY_2}),
+    'search': BingKeyManager('search', BGS_ENDPOINT, {'BGS_KEY_1': BGS_KEY_1, 'BGS_KEY_2': BGS_KEY_2}),
+}
+
+
+def get_key_manager(search_type: str) -> BingKeyManager:
+    return key_managers['news' if search_type == 'news' else 'search']
@@ -0,0 +1,21 @@
+import asyncio
+
+from config import BING_CONCURRENCY, LLM_CONCURRENCY, BROWSER_CONCURRENCY, RENDER_CONCURRENCY
+
+# Максимальна кількість одночасних операцій для кожного етапу обробки новини
+STAGE_LIMITS = {
+    'bing': BING_CONCURRENCY,
+    'llm': LLM_CONCURRENCY,
+    'browser': BROWSER_CONCURRENCY,
+    'render': RENDER_CONCURRENCY,
+}
+
+_stage_semaphores: dict[str, asyncio.Semaphore] = {}
+
+
+def stage_limit(stage: str) -> asyncio.Semaphore:
+    """Повертає спільний семафор етапу. Використання: async with stage_limit('llm'): ..."""
+    semaphore = _stage_semaphores.get(stage)
+    if semaphore is None:
+        semaphore = _stage_semaphores[stage] = asyncio.Semaphore(STAGE_LIMITS[stage])
+    return semaphore
@@ -0,0 +1,106 @@
+import logging
+import time
+from collections import deque
+from datetime import datetime
+
+from config import DEDUP_TTL_SECONDS, DEDUP_BUCKET_SECONDS, DEDUP_MAX_ITEMS
+from db_layer.db_factory import get_data_serice
+
+
+def _utc_string(timestamp: float) -> str:
+    return datetime.utcfromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')
+
+
+class DedupStore:
+    """
+    Спільне сховище вже опублікованих статей (хеш URL + канал).
+
+    У пам'яті записи групуються в часові кошики по bucket_seconds: прострочені кошики знімаються з початку
+    черги, тому очищення амортизовано O(1) і не переглядає всі записи. Кількість записів у пам'яті
+    обмежена max_items (найстаріші витісняються першими).
+    Кожен запис одразу зберігається в таблицю Published_links, тому перевірка працює між процесами
+    та після перезапуску: якщо хешу немає в пам'яті, він шукається в базі даних.
+    Запис живе в пам'яті від ttl до ttl + bucket_seconds; знайдені в базі даних записи кешуються від моменту перевірки.
+    """
+
+    def __init__(self, ttl: int = DEDUP_TTL_SECONDS, bucket_seconds: int = DEDUP_BUCKET_SECONDS,
+                 max_items: int = DEDUP_MAX_ITEMS):
+        self.ttl = ttl
+        self.bucket_seconds = bucket_seconds
+        self.max_items = max_items
+        self._entries = {}  # (url_hash, channel) -> номер кошика
+        self._buckets = deque()  # (номер кошика, deque ключів); ключ без пари в _entries вважається застарілим
+        self._next_purge = 0.0
+
+    def _bucket(self, timestamp: float) -> int:
+        return int(timestamp // self.bucket_seconds)
+
+    def _expire(self, now: float):
+        oldest_alive = self._bucket(now - self.ttl)
+        while self._buckets and self._buckets[0][0] < oldest_alive:
+            bucket, keys = self._buckets.popleft()
+            for key in keys:
+                if self._entries.get(key) == bucket:
+                    del self._entries[key]
+
+    def _evict_oldest(self):
+        while len(self._entries) > self.max_items and self._buckets:
+            bucket, keys = self._buckets[0]
+            if not keys:
+                self._buckets.popleft()
+                continue
+            key = keys.popleft()
+            if self._entries.get(key) == bucket:
+                del self._entries[key]
+
+    def _remember(self, key: tuple, timestamp: float):
+        bucket = self._bucket(timestamp)
+        if not self._buckets or self._buckets[-1][0] < bucket:
+            self._buckets.append((bucket, deque()))
+        # Кошики йдуть за зростанням часу, тому ключ завжди додається в останній
+        self._buckets[-1][1].append(key)
+        self._entries[key] = self._buckets[-1][0]
+        self._evict_oldest()
+
+    async def filter_unseen(self, url_hashes: list, channel) -> list:
+        """Повертає хеші з url_hashes (у тому ж порядку), що ще не публікувались у каналі протягом ttl."""
+        now = time.time()
+        self._expire(now)
+        channel = channel or ''
+
+        missing = [url_hash for url_hash in url_hashes if (url_hash, channel) not in self._entries]
+        if not missing:
+            return []
+
+        try:
+            async with get_data_serice() as db:
+                published = await db.get_published_links(list(set(missing)), channel, _utc_string(now - self.ttl))
+        except Exception as e:
+            logging.error(f"Помилка перевірки опублікованих посилань: {e}")
+            published = set()
+
+        for url_hash in published:
+            self._remember((url_hash, channel), now)
+        return [url_hash for url_hash in missing if url_hash not in published]
+
+    async def add(self, url_hash: str, channel):
+        """Позначає статтю опублікованою в каналі (пам'ять + запис у базу даних)."""
+        now = time.time()
+        channel = channel or ''
+        self._remember((url_hash, channel), now)
+
+        try:
+            async with get_data_serice() as db:
+                await db.add_published_link(url_hash, channel, _utc_string(now))
+                if now >= self._next_purge:
+                    await db.delete_published_links_before(_utc_string(now - self.ttl))
+                    self._next_purge = now + self.bucket_seconds
+        except Exception as e:
+            logging.error(f"Помилка збереження опублікованого посилання: {e}")
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# Створюємо глобальне сховище, спільне для всіх модулів процесу
+dedup_store = DedupStore()
@@ -0,0 +1,86 @@
+import asyncio
+import hashlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from deep_translator import GoogleTranslator
+
+from config import TRANSLATE_FALLBACK_WORKERS, TRANSLATE_FALLBACK_TIMEOUT_SECONDS, TRANSLATE_FALLBACK_CACHE_ITEMS
+from news_processing.metrics import registry, Counter
+
+FALLBACK_TRANSLATIONS_TOTAL = registry.register(Counter(
+    'news_fallback_translations_total', 'Google Translate fallback translations by result', ('result',)))
+
+
+class FallbackTranslator:
+    """
+    Запасний переклад через Google Translate, коли LLM недоступна.
+
+    GoogleTranslator синхронний, тому переклад виконується в окремому пулі з max_workers потоків;
+    одночасно в пул передається не більше max_workers задач, тож черга не росте під час збою LLM.
+    Очікування обмежене timeout секундами. Результати зберігаються в LRU-кеші за (хеш тексту, мова),
+    зокрема й переклади, що завершилися вже після таймауту.
+    """
+
+    def __init__(self, max_workers: int = TRANSLATE_FALLBACK_WORKERS,
+                 timeout: float = TRANSLATE_FALLBACK_TIMEOUT_SECONDS,
+                 max_items: int = TRANSLATE_FALLBACK_CACHE_ITEMS):
+        self.timeout = timeout
+        self.max_items = max_items
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='fallback-translate')
+        self._slots = asyncio.Semaphore(max_workers)
+        self._cache = OrderedDict()  # (хеш тексту, мова) -> переклад
+
+    @staticmethod
+    def _key(text: str, target: str) -> tuple:
+        return hashlib.sha256(text.encode()).hexdigest(), target
+
+    def _remember(self, key: tuple, translated: str):
+        self._cache[key] = translated
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_items:
+            self._cache.popitem(last=False)
+
+    @staticmethod
+    def _translate(text: str, target: str) -> str:
+        return GoogleTranslator(target=target).translate(text)
+
+    async def _run(self, key: tuple, text: str, target: str) -> str:
+        await self._slots.acquire()
+        future = asyncio.get_running_loop().run_in_executor(self._executor, self._translate, text, target)
+
+        def done(completed: asyncio.Future):
+            # Слот звільняється, лише коли потік справді завершив роботу, а не коли сплив таймаут
+            self._slots.release()
+            if not completed.cancelled() and completed.exception() is None and completed.result():
+                self._remember(key, completed.result())
+
+        future.add_done_callback(done)
+        return await asyncio.shield(future)
+
+    async def translate(self, text: str, target: str = 'uk') -> str:
+        """Перекладає text мовою target; кидає виняток, якщо переклад не вдався або не встиг за timeout."""
+        key = self._key(text, target)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            FALLBACK_TRANSLATIONS_TOTAL.inc(result='cache_hit')
+            return cached
+
+        try:
+            translated = await asyncio.wait_for(self._run(key, text, target), self.timeout)
+        except asyncio.TimeoutError:
+            FALLBACK_TRANSLATIONS_TOTAL.inc(result='timeout')
+            raise
+        except Exception:
+            FALLBACK_TRANSLATIONS_TOTAL.inc(result='error')
+            raise
+        FALLBACK_TRANSLATIONS_TOTAL.inc(result='ok')
+        return translated
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Створюємо глобальний перекладач процесу
+fallback_translator = FallbackTranslator()
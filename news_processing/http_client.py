@@ -0,0 +1,48 @@
+import asyncio
+import logging
+
+import aiohttp
+
+from config import (HTTP_POOL_LIMIT, HTTP_POOL_PER_HOST, HTTP_DNS_CACHE_SECONDS, HTTP_KEEPALIVE_SECONDS,
+                    HTTP_TIMEOUT_SECONDS)
+
+
+class HttpClient:
+    """
+    Спільний для процесу aiohttp.ClientSession для всіх вихідних запитів (Bing, зображення, сайти новин).
+    З'єднання тримаються відкритими (keep-alive) і кешується DNS, тому повторні запити до того ж хоста
+    не платять за новий TCP/TLS handshake. Сесія створюється ліниво і закривається через close() при зупинці.
+    """
+
+    def __init__(self):
+        self._session = None
+        self._loop = None
+
+    def _create_session(self) -> aiohttp.ClientSession:
+        connector = aiohttp.TCPConnector(
+            limit=HTTP_POOL_LIMIT,
+            limit_per_host=HTTP_POOL_PER_HOST,
+            ttl_dns_cache=HTTP_DNS_CACHE_SECONDS,
+            keepalive_timeout=HTTP_KEEPALIVE_SECONDS,
+        )
+        return aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=HTTP_TIMEOUT_SECONDS))
+
+    def session(self) -> aiohttp.ClientSession:
+        """Повертає спільну сесію поточного event loop (створює її за потреби)."""
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            if self._session is not None and not self._session.closed:
+                logging.warning("HTTP session belongs to another event loop, creating a new one")
+            self._session = self._create_session()
+            self._loop = loop
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._loop = None
+
+
+# Створюємо глобальний HTTP-клієнт
+http_client = HttpClient()
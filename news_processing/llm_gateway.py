@@ -0,0 +1,109 @@
+import asyncio
+import logging
+import random
+
+import httpx
+from openai import AsyncAzureOpenAI, RateLimitError, APITimeoutError, APIConnectionError, InternalServerError
+
+from config import (AZURE_OPENAI_API_KEY, AZURE_OPENAI_ENDPOINT, AZURE_OPENAI_API_VERSION, LLM_DEPLOYMENT,
+                    LLM_TIMEOUT_SECONDS, LLM_MAX_RETRIES, LLM_MAX_CONNECTIONS)
+from news_processing.concurrency import stage_limit
+from news_processing.metrics import registry, Counter, Histogram
+from news_processing.single_flight import single_flight
+
+LLM_REQUESTS_TOTAL = registry.register(Counter(
+    'news_llm_requests_total', 'LLM gateway requests by outcome', ('outcome',)))
+LLM_LATENCY_SECONDS = registry.register(Histogram(
+    'news_llm_latency_seconds', 'Latency of successful LLM requests'))
+
+# Базова затримка експоненційного повтору (секунди) та її максимум
+BACKOFF_BASE = 1
+BACKOFF_MAX = 30
+
+
+class LLMGateway:
+    """
+    Асинхронний шлюз до Azure OpenAI.
+    Один AsyncAzureOpenAI з пулом keep-alive з'єднань на процес, не більше LLM_CONCURRENCY запитів одночасно
+    (stage_limit('llm')), таймаут на кожен запит і повтори з експоненційною затримкою після 429, таймаутів та 5xx.
+    Під час очікування повтору слот паралельності звільняється.
+    """
+
+    def __init__(self):
+        self._client = None
+        self._loop = None
+
+    async def client(self) -> AsyncAzureOpenAI:
+        """
+        Повертає клієнт поточного event loop. Клієнт, створений в іншому event loop, спершу закривається,
+        щоб його пул з'єднань не залишився відкритим.
+        """
+        loop = asyncio.get_running_loop()
+        if self._client is not None and self._loop is not loop:
+            logging.warning("LLM client belongs to another event loop, closing it and creating a new one")
+            await self.close()
+        if self._client is None:
+            self._client = AsyncAzureOpenAI(
+                api_key=AZURE_OPENAI_API_KEY,
+                api_version=AZURE_OPENAI_API_VERSION,
+                azure_endpoint=AZURE_OPENAI_ENDPOINT,
+                max_retries=0,  # Повтори виконуються в chat(), щоб не тримати слот паралельності під час очікування
+                timeout=LLM_TIMEOUT_SECONDS,
+                http_client=httpx.AsyncClient(limits=httpx.Limits(max_connections=LLM_MAX_CONNECTIONS,
+                                                                  max_keepalive_connections=LLM_MAX_CONNECTIONS)),
+            )
+            self._loop = loop
+        return self._client
+
+    @staticmethod
+    def _retry_delay(error: Exception, attempt: int) -> float:
+        response = getattr(error, 'response', None)
+        if response is not None:
+            try:
+                return min(float(response.headers.get('retry-after')), BACKOFF_MAX)
+            except (TypeError, ValueError):
+                pass
+        return min(BACKOFF_BASE * 2 ** attempt, BACKOFF_MAX) * random.uniform(0.5, 1)
+
+    @single_flight('llm')
+    async def chat(self, messages: list[dict], model: str = LLM_DEPLOYMENT, timeout: float = LLM_TIMEOUT_SECONDS,
+                   **kwargs) -> str:
+        """
+        Виконує chat completion і повертає текст першої відповіді.
+        Однакові одночасні запити (ті самі повідомлення й параметри) виконуються один раз.
+        """
+        attempt = 0
+        while True:
+            try:
+                async with stage_limit('llm'):
+                    started = asyncio.get_running_loop().time()
+                    client = await self.client()
+                    response = await client.chat.completions.create(
+                        messages=messages, model=model, timeout=timeout, **kwargs)
+                LLM_LATENCY_SECONDS.observe(asyncio.get_running_loop().time() - started)
+                LLM_REQUESTS_TOTAL.inc(outcome='ok')
+                return response.choices[0].message.content
+            except (RateLimitError, APITimeoutError, APIConnectionError, InternalServerError) as e:
+                outcome = 'throttled' if isinstance(e, RateLimitError) else 'retryable_error'
+                LLM_REQUESTS_TOTAL.inc(outcome=outcome)
+                if attempt >= LLM_MAX_RETRIES:
+                    raise
+                delay = self._retry_delay(e, attempt)
+                attempt += 1
+                logging.warning(f"LLM request failed ({e.__class__.__name__}), retry {attempt}/{LLM_MAX_RETRIES} "
+                                f"in {delay:.1f} s")
+                await asyncio.sleep(delay)
+
+    async def close(self):
+        client, self._client, self._loop = self._client, None, None
+        if client is None:
+            return
+        try:
+            await client.close()
+        except Exception as e:
+            # З'єднання клієнта з уже закритого event loop не закриваються штатно
+            logging.warning(f"Cannot close LLM client cleanly: {e!r}")
+
+
+# Створюємо глобальний шлюз процесу
+llm_gateway = LLMGateway()
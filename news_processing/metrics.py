@@ -0,0 +1,151 @@
+import bisect
+import threading
+
+from aiohttp import web
+
+# Межі кошиків гістограм у секундах
+LATENCY_BUCKETS = (0.5, 1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600)
+DURATION_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def _label_key(labelnames: tuple, labels: dict) -> tuple:
+    return tuple(str(labels.get(name, '')) for name in labelnames)
+
+
+def _format_labels(labelnames: tuple, key: tuple, extra: str = '') -> str:
+    parts = [f'{name}="{value}"' for name, value in zip(labelnames, key)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+class Counter:
+    """Лічильник, що лише зростає (формат Prometheus counter)."""
+    kind = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, _format_labels(self.labelnames, key), value) for key, value in self._values.items()]
+
+
+class Gauge(Counter):
+    """Значення, яке може як зростати, так і зменшуватись."""
+    kind = 'gauge'
+
+    def set(self, value: float, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram:
+    """Гістограма з фіксованими кошиками (формат Prometheus histogram)."""
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, buckets: tuple = DURATION_BUCKETS, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}  # ключ міток -> [лічильники кошиків, сума, кількість]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = _label_key(self.labelnames, labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            if index < len(self.buckets):
+                state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def samples(self):
+        result = []
+        with self._lock:
+            for key, (bucket_counts, total, count) in self._values.items():
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, bucket_counts):
+                    cumulative += bucket_count
+                    result.append((f'{self.name}_bucket', _format_labels(self.labelnames, key, f'le="{bound}"'),
+                                   cumulative))
+                result.append((f'{self.name}_bucket', _format_labels(self.labelnames, key, 'le="+Inf"'), count))
+                result.append((f'{self.name}_sum', _format_labels(self.labelnames, key), total))
+                result.append((f'{self.name}_count', _format_labels(self.labelnames, key), count))
+        return result
+
+
+class MetricsRegistry:
+    """Реєстр метрик процесу з виведенням у текстовому форматі Prometheus."""
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            for name, labels, value in metric.samples():
+                lines.append(f'{name}{labels} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+# Планувальник публікацій
+SCHEDULER_TICK_SECONDS = registry.register(Histogram(
+    'news_scheduler_tick_seconds', 'Duration of one scheduler loop iteration, excluding sleep'))
+SCHEDULER_DUE_TOTAL = registry.register(Counter(
+    'news_scheduler_due_total', 'Subscriptions popped from the schedule as due'))
+SCHEDULER_SKIPPED_TOTAL = registry.register(Counter(
+    'news_scheduler_skipped_total', 'Due subscriptions that were not published by this worker', ('reason',)))
+SCHEDULER_PUBLISHED_TOTAL = registry.register(Counter(
+    'news_scheduler_published_total', 'Subscriptions handed over for publishing'))
+SCHEDULER_CLAIM_LAG_SECONDS = registry.register(Histogram(
+    'news_scheduler_claim_lag_seconds', 'Time between the configured due moment and claiming the publication lease',
+    LATENCY_BUCKETS))
+SCHEDULER_SCHEDULED = registry.register(Gauge(
+    'news_scheduler_scheduled', 'Subscriptions currently held in the schedule heap'))
+
+# Outbox публікацій
+OUTBOX_DELAY_SECONDS = registry.register(Histogram(
+    'news_outbox_delay_seconds', 'Time between enqueueing a publication and its successful send', LATENCY_BUCKETS))
+PUBLICATION_LATENESS_SECONDS = registry.register(Histogram(
+    'news_publication_lateness_seconds', 'Time between the configured due moment and the successful Telegram send',
+    LATENCY_BUCKETS))
+OUTBOX_RESULTS_TOTAL = registry.register(Counter(
+    'news_outbox_results_total', 'Outbox send attempts by result', ('result',)))
+
+
+async def metrics_handler(request):
+    """Віддає метрики процесу в текстовому форматі Prometheus."""
+    return web.Response(text=registry.render(), content_type='text/plain', charset='utf-8')
+
+
+async def start_metrics_server(host: str, port: int) -> web.AppRunner:
+    """Запускає окремий HTTP-сервер з /metrics (для процесів-воркерів без вебхука)."""
+    app = web.Application()
+    app.router.add_get('/metrics', metrics_handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
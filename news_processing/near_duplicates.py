@@ -0,0 +1,113 @@
+import hashlib
+import itertools
+import re
+import time
+from collections import deque
+
+from config import NEAR_DUPLICATE_DISTANCE, NEAR_DUPLICATE_WINDOW_SECONDS, NEAR_DUPLICATE_MAX_ITEMS
+from news_processing.metrics import registry, Counter
+
+NEAR_DUPLICATES_SKIPPED_TOTAL = registry.register(Counter(
+    'news_near_duplicates_skipped_total', 'Article candidates skipped as near-duplicates before scraping or LLM calls'))
+
+SIGNATURE_BITS = 64
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def _features(text: str) -> list[str]:
+    # Для коротких сніпетів Bing окремі слова дають стабільніший підпис, ніж пари слів:
+    # одна вставка чи пропуск слова змінює лише одну ознаку
+    return TOKEN_RE.findall(text.lower())
+
+
+def simhash(text: str) -> int:
+    """64-бітний SimHash тексту: схожі тексти дають підписи з малою відстанню Геммінга."""
+    weights = [0] * SIGNATURE_BITS
+    for feature in _features(text):
+        value = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), 'big')
+        for bit in range(SIGNATURE_BITS):
+            weights[bit] += 1 if value >> bit & 1 else -1
+
+    signature = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            signature |= 1 << bit
+    return signature
+
+
+def item_signature(item: dict) -> int:
+    """Підпис кандидата новини за заголовком і коротким текстом з Bing."""
+    return simhash(f"{item.get('title') or ''} {item.get('general_text') or ''}")
+
+
+def is_similar(first: int, second: int, distance: int = NEAR_DUPLICATE_DISTANCE) -> bool:
+    return (first ^ second).bit_count() <= distance
+
+
+class NearDuplicateIndex:
+    """
+    Індекс підписів опублікованих статей для пошуку майже однакових історій з різних сайтів.
+
+    Підпис розбивається на distance + 1 смуг (LSH): якщо два підписи відрізняються не більше ніж
+    на distance біт, хоча б одна смуга в них збігається, тому порівнюються лише підписи зі спільною смугою.
+    Індекс окремий для кожного каналу; записи старші за window секунд або понад max_items видаляються.
+    """
+
+    def __init__(self, distance: int = NEAR_DUPLICATE_DISTANCE, window: int = NEAR_DUPLICATE_WINDOW_SECONDS,
+                 max_items: int = NEAR_DUPLICATE_MAX_ITEMS):
+        self.distance = distance
+        self.window = window
+        self.max_items = max_items
+
+        bands = distance + 1
+        width, extra = divmod(SIGNATURE_BITS, bands)
+        self._bands = []  # (зсув, маска) для кожної смуги
+        shift = 0
+        for band in range(bands):
+            band_width = width + (1 if band < extra else 0)
+            self._bands.append((shift, (1 << band_width) - 1))
+            shift += band_width
+
+        self._tables = {}  # (канал, номер смуги, значення смуги) -> {id запису: підпис}
+        self._order = deque()  # (час, id запису, канал, підпис) у порядку додавання
+        self._ids = itertools.count()
+
+    def _band_keys(self, channel, signature: int):
+        return [(channel, band, signature >> shift & mask) for band, (shift, mask) in enumerate(self._bands)]
+
+    def _drop_oldest(self):
+        _, entry_id, channel, signature = self._order.popleft()
+        for key in self._band_keys(channel, signature):
+            entries = self._tables.get(key)
+            if entries is not None:
+                entries.pop(entry_id, None)
+                if not entries:
+                    del self._tables[key]
+
+    def _expire(self, now: float):
+        while self._order and (self._order[0][0] < now - self.window or len(self._order) > self.max_items):
+            self._drop_oldest()
+
+    def contains(self, channel, signature: int) -> bool:
+        """Чи публікувалась у каналі протягом window історія, схожа на signature."""
+        self._expire(time.time())
+        for key in self._band_keys(channel, signature):
+            for other in self._tables.get(key, {}).values():
+                if is_similar(signature, other, self.distance):
+                    return True
+        return False
+
+    def add(self, channel, signature: int):
+        now = time.time()
+        entry_id = next(self._ids)
+        for key in self._band_keys(channel, signature):
+            self._tables.setdefault(key, {})[entry_id] = signature
+        self._order.append((now, entry_id, channel, signature))
+        self._expire(now)
+
+    def __len__(self):
+        return len(self._order)
+
+
+# Створюємо глобальний індекс процесу
+near_duplicates = NearDuplicateIndex()
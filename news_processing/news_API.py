@@ -1,15 +1,21 @@
 import asyncio
 import hashlib
 import logging
-import aiohttp
 
 from datetime import datetime
 from urllib.parse import urlencode
-from langdetect import detect
 
-from config import BG_KEY_1, BG_KEY_2, BG_ENDPOINT, BGS_KEY_1, BGS_KEY_2, BGS_ENDPOINT
+from config import BING_CACHE_TTL_SECONDS, CLASSIFY_TOP_K
+from news_processing.bing_keys import get_key_manager
+from news_processing.concurrency import stage_limit
+from news_processing.dedup_store import dedup_store
+from news_processing.http_client import http_client
+from news_processing.near_duplicates import (near_duplicates, item_signature, is_similar,
+                                             NEAR_DUPLICATES_SKIPPED_TOTAL)
 from news_processing.processing_API import WebScraperTranslator
-from news_processing.ttl_cache_class import TTLCache
+from news_processing.query_profiles import QueryProfileCache
+from news_processing.response_cache import ResponseCache
+from news_processing.single_flight import single_flight
 
 wst = WebScraperTranslator()
 
@@ -48,7 +54,10 @@ class BingNewsAPI:
     'lu': 'LU', 'ba': 'BA', 'me': 'ME', 'al': 'AL', 'ee': 'EE', 'se': 'SE', 'dk': 'DK',
 }
 
-        self.ttl_cache = TTLCache(ttl=3600 * 12)
+        # Мова, регіон і параметри запиту обчислюються один раз на тему
+        self.query_profiles = QueryProfileCache(self.categories, self.language_region_map)
+        # Кеш відповідей Bing, спільний для всіх підписок, воркерів і перезапусків
+        self.response_cache = ResponseCache('bing', ttl=BING_CACHE_TTL_SECONDS)
 
     async def get_url_hash(self, url: str) -> str:
         return hashlib.sha256(url.encode()).hexdigest()
@@ -64,89 +73,61 @@ class BingNewsAPI:
     async def get_news_from_bing(self, query_list: list, channel_id: str, search_type: str) -> list or None:
         results = []
         for query in query_list:
-            if query in self.categories:
+            if self.query_profiles.get(query).is_category:
                 search_type = 'news'
 
         try:
-            async with aiohttp.ClientSession() as session:
-                tasks = []
-                for query in query_list:
-                    params = self._get_params(query, search_type)
-                    endpoint, key_1, key_2 = self._get_endpoint_and_keys(search_type)
+            session = http_client.session()
+            tasks = []
+            for query in query_list:
+                params = self._get_params(query, search_type)
+                endpoint = get_key_manager(search_type).endpoint
 
-                    query_string = urlencode(params)
-                    url = f'{endpoint}?{query_string}'
+                query_string = urlencode(params)
+                url = f'{endpoint}?{query_string}'
 
-                    headers = {'Ocp-Apim-Subscription-Key': key_1}
-                    headers_reserve = {'Ocp-Apim-Subscription-Key': key_2}
-
-                    tasks.append(self.fetch_bing_data(session, url, headers, headers_reserve, query, search_type))
+                cache_key = ResponseCache.make_key(params['q'], search_type, params['cc'], params['setLang'],
+                                                   params.get('freshness'))
+                tasks.append(self.fetch_bing_data(session, url, query, search_type, cache_key))
 
+            async with stage_limit('bing'):
                 responses = await asyncio.gather(*tasks)
 
-                results = self._process_responses(responses, query_list, search_type)
+            results = self._process_responses(responses, query_list, search_type)
 
-                sorted_results = self.sort_news_by_date(results)
-                return sorted_results if sorted_results else None
+            sorted_results = self.sort_news_by_date(results)
+            return sorted_results if sorted_results else None
         except Exception as ex:
             logging.exception('Exception in get_news_from_bing', exc_info=ex)
             return None
 
     def get_request_language(self, query: str) -> str:
-        unique_chars = {
-        'uk': 'єіїґ',
-        'ru': 'ёыэъ',
-        'be': 'ўэ',
-        'de': 'äöüß'
-    }
-        for lang, chars in unique_chars.items():
-            if any(char in query for char in chars):
-                return lang
-
-        try:
-            request_lang = detect(query)
-            return request_lang if request_lang in unique_chars else 'en'
-        except Exception:
-            return 'en'
-        
+        return self.query_profiles.get(query).language
 
     def _get_params(self, query, search_type):
-        language = self.get_request_language(query)
-        region = self.language_region_map.get(language, 'US')
-        print(f'{language} - {region}')
-
-        params = {'q': query,'cc': region ,'setLang': language, 'originalImg': True}
-
-        if search_type == 'news':
-            params['freshness'] = 'week'
-        elif search_type == 'standart':
-            params['answerCount'] = '2'
-            params['promote'] = 'News,Webpages'
-            params['q'] += '" news"'
-
-        return params
-
-    def _get_endpoint_and_keys(self, search_type):
-        if search_type == 'news':
-            return BG_ENDPOINT, BG_KEY_1, BG_KEY_2
-        else:
-            return BGS_ENDPOINT, BGS_KEY_1, BGS_KEY_2
-
-    async def fetch_bing_data(self, session, url, headers, headers_reserve, category, search_type) -> dict:
-        try:
-            async with session.get(url, headers=headers) as response:
-                data = await response.json()
-                if data:
-                    data['category'] = category
-                return data
-        except Exception as ex:
-            logging.exception("Error fetch_bing_data", exc_info=ex)
-            async with session.get(url, headers=headers_reserve) as response:
-                data = await response.json()
-                if data:
-                    data['category'] = category
+        return self.query_profiles.get(query).params(search_type)
+
+    @staticmethod
+    def _is_cacheable(data) -> bool:
+        return bool(data) and data.get('_type') != 'ErrorResponse' and any(
+            key in data for key in ('value', 'webPages', 'news'))
+
+    # Однакові запити кількох каналів з тією ж темою в одному тіку виконуються один раз
+    @single_flight('bing', key=lambda self, session, url, category, search_type, cache_key=None: (url, category))
+    async def fetch_bing_data(self, session, url, category, search_type, cache_key: str | None = None) -> dict:
+        if cache_key:
+            data = await self.response_cache.get(cache_key)
+            if data is not None:
                 return data
 
+        # Ротація ключів, обробка 429/403 та запобіжник ендпоінта - у BingKeyManager
+        data = await get_key_manager(search_type).fetch(session, url)
+        if data:
+            data['category'] = category
+        if cache_key and self._is_cacheable(data):
+            await self.response_cache.set(cache_key, data)
+        return data
+
     def _process_responses(self, responses, query_list, search_type):
         results = []
         for idx, data in enumerate(responses):
@@ -160,6 +141,7 @@ class BingNewsAPI:
     def _process_news_results(self, data, category):
         return [{
             'url': item.get('url'),
+            'title': item.get('name', ''),
             'general_text': item.get('description', ''),
             'categories': data.get('category', category),
             'image_url': item.get('image', {}).get('thumbnail', {}).get('contentUrl') if item.get('image') else 'None',
@@ -171,6 +153,7 @@ class BingNewsAPI:
         for item in data.get('webPages', {}).get('value', []):
             results.append({
                 'url': item.get('url'),
+                'title': item.get('name', ''),
                 'general_text': item.get('snippet', ''),
                 'categories': category,
                 'image_url': 'None',
@@ -179,6 +162,7 @@ class BingNewsAPI:
         for item in data.get('news', {}).get('value', []):
             results.append({
                 'url': item.get('url'),
+                'title': item.get('name', ''),
                 'general_text': item.get('description', ''),
                 'categories': category,
                 'image_url': item.get('image', {}).get('thumbnail', {}).get('contentUrl') if item.get(
@@ -187,67 +171,118 @@ class BingNewsAPI:
             })
         return results
 
-    async def main(self, request, channel=None, search_type='news') -> dict or None:
+    @staticmethod
+    def _unique_requests(request) -> list:
         if isinstance(request, str):
             request = [request]
-        request = list(set(request))  # Унікальні запити
+        return list(set(request))  # Унікальні запити
+
+    async def fetch_candidates(self, request, search_type='news') -> list:
+        """
+        Отримує відсортований список новин-кандидатів для запиту без вибору статті для каналу.
+        Результат можна спільно використати для всіх каналів з тією ж темою.
+        Якщо запит не вдався або нічого не знайдено, повертає порожній список (а не None),
+        щоб main не повторював запит до Bing для кожного каналу.
+        """
+        return await self.get_news_from_bing(query_list=self._unique_requests(request), channel_id=None,
+                                             search_type=search_type) or []
+
+    async def first_acceptable_article(self, news_list: list, channel=None, top_k: int = CLASSIFY_TOP_K) -> dict | None:
+        """
+        Повертає першу за рангом ще не опубліковану в каналі статтю, яку check_article визнав новиною.
+        Кандидати класифікуються пачками по top_k, кожна пачка одним запитом до LLM (check_articles);
+        вердикти перевіряються в порядку рангу, і наступна пачка запитується, лише якщо в поточній
+        прийнятної статті немає.
+        Переглянутими в каналі позначаються лише кандидати до обраної статті включно.
+        Майже однакові історії (та сама новина на різних сайтах) відкидаються до класифікації:
+        і схожі на вже опубліковане в каналі, і повтори вищих за рангом кандидатів.
+        """
+        hashed = [(item, await self.get_url_hash(item.get('url'))) for item in news_list]
+        unseen_hashes = set(await dedup_store.filter_unseen([url_hash for _, url_hash in hashed], channel))
+
+        unseen = []
+        signatures = []
+        for item, url_hash in hashed:
+            if url_hash not in unseen_hashes:
+                continue
+            unseen_hashes.discard(url_hash)  # Однаковий URL у списку перевіряємо лише раз
+
+            signature = item_signature(item)
+            if near_duplicates.contains(channel, signature) or any(is_similar(signature, other)
+                                                                   for other in signatures):
+                NEAR_DUPLICATES_SKIPPED_TOTAL.inc()
+                continue
+            signatures.append(signature)
+            unseen.append((item, url_hash))
+
+        for start in range(0, len(unseen), top_k):
+            batch = unseen[start:start + top_k]
+            verdicts = await wst.check_articles([item for item, _ in batch])
+            for (item, url_hash), check_for_article in zip(batch, verdicts):
+                await dedup_store.add(url_hash, channel)
+                if check_for_article == 'True':
+                    return item
+        return None
+
+    async def select_news(self, news_list: list, channel=None) -> dict:
+        """Вибирає з news_list першу ще не опубліковану в каналі статтю та перекладає її."""
         news = {}
-        news_list = await self.get_news_from_bing(query_list=request, channel_id=channel, search_type=search_type)
-        # print('News list = {}'.format(news_list), '\n'*4)
+        try:
+            item = await self.first_acceptable_article(news_list, channel)
+            if item is not None:
+                near_duplicates.add(channel, item_signature(item))
+                # Копіюємо запис, бо news_list може бути спільним для кількох каналів
+                item = dict(item)
+                general_text = item.get('general_text', '')
+                translated_text = await wst.translate_string(content=general_text, url=item.get('url'))
+                item['general_text'] = translated_text
+                news[item.get('categories')] = item
+
+            if not news:
+                # Якщо всі новини вже опубліковані, вибираємо найновішу
+                latest_news = dict(news_list[0])
+                near_duplicates.add(channel, item_signature(latest_news))
+                category = latest_news.get('categories')
+                url = latest_news.get('url')
+                general_text = latest_news.get('general_text', '')
+                translated_text = await wst.translate_string(content=general_text, url=url)
+                latest_news['general_text'] = translated_text
+                news[category] = latest_news
+
+        except Exception as ex:
+            logging.exception('Error in main in news_API', exc_info=ex)
+
+        return news
+
+    async def main(self, request, channel=None, search_type='news', news_list=None) -> dict or None:
+        """
+        Повертає новину для каналу.
+        news_list - заздалегідь отриманий список кандидатів (див. fetch_candidates), щоб не повторювати запит до Bing.
+        Порожній news_list означає, що спільний запит нічого не дав; повторного запиту тоді не буде.
+        """
+        request = self._unique_requests(request)
+        if news_list is None:
+            news_list = await self.get_news_from_bing(query_list=request, channel_id=channel, search_type=search_type)
 
         if news_list:
-            try:
-                for item in news_list:
-                    category = item.get('categories')
-                    url = item.get('url')
-                    url_hash = await self.get_url_hash(url)
-
-                    await self.ttl_cache.clean_up()
-
-                    if not self.ttl_cache.contains(url_hash, channel):
-                        self.ttl_cache.add(url_hash, channel)
-                        general_text = item.get('general_text', '')
-                        # print('General text: {}'.format(general_text), '\n'*4)
-                        check_for_article = await wst.check_article(content=general_text, url=url)
-                        # print('Check from article', type(check_for_article), '\n'*4)
-                        if check_for_article == 'True':
-                            # print(bool(check_for_article))
-                            translated_text = await wst.translate_string(content=general_text, url=url, raw_text=item)
-                            item['general_text'] = translated_text
-                            news[category] = item
-                            break  # Вибираємо першу непубліковану новину
-                        else:
-                            # Потрібно вибрати другу статтю з повернених
-                            continue
-
-                if not news:
-                    # Якщо всі новини вже опубліковані, вибираємо найновішу
-                    latest_news = news_list[0]
-                    category = latest_news.get('categories')
-                    url = latest_news.get('url')
-                    general_text = latest_news.get('general_text', '')
-                    translated_text = await wst.translate_string(content=general_text, url=url)
-                    latest_news['general_text'] = translated_text
-                    news[category] = latest_news
-
-            except Exception as ex:
-                logging.exception('Error in main in news_API', exc_info=ex)
-
-            return news
+            return await self.select_news(news_list, channel)
         else:
             return await self._get_cat_image(request[0])
 
     async def _get_cat_image(self, category):
         url = 'https://api.thecatapi.com/v1/images/search'
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as response:
-                data = await response.json()
-                return {category: {
-                    'url': data[0].get('url'),
-                    'general_text': f'Згідно з вашим запитом {category} наразі нічого не знайдено.\n Ось Вам котик:',
-                    'categories': category,
-                    'image_url': data[0].get('url'),
-                }}
+        async with http_client.session().get(url) as response:
+            data = await response.json()
+            return {category: {
+                'url': data[0].get('url'),
+                'general_text': f'Згідно з вашим запитом {category} наразі нічого не знайдено.\n Ось Вам котик:',
+                'categories': category,
+                'image_url': data[0].get('url'),
+            }}
+
+
+# Спільний екземпляр для всіх модулів (news_pre_publisher, news_image_processing)
+news_api = BingNewsAPI()
 
 
 # Приклад використання
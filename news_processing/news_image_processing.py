@@ -3,27 +3,43 @@ import os
 import asyncio
 import random
 import time
+import uuid
 
 import aiofiles
-import aiohttp
 from PIL import Image, ImageDraw, ImageFont
-from news_processing.news_API import BingNewsAPI
-
-get_news = BingNewsAPI()
+from news_processing.concurrency import stage_limit
+from news_processing.http_client import http_client
+from news_processing.news_API import news_api as get_news
 
 # Шлях до папки для збереження зображень
 PATH = os.path.abspath('tmp_pic/')
 # print(PATH)
 FONT_PATH = os.path.abspath('fonts/Roboto-Regular.ttf')
+# Вік (хвилини), після якого залишки зображень видаляються з PATH, і як часто (секунди) виконувати очищення
+OLD_FILES_MAX_AGE_MINUTES = 10
+CLEANUP_INTERVAL = 600
+
+_next_cleanup = 0.0
 
 
 
 async def picture_process(pic_url: str, text_to_image: str, need_to_resize: bool = False):
-    # Отримуємо ім'я зображення з URL
-    image_name = pic_url.split('/')[-1]
+    # Отримуємо ім'я зображення з URL; унікальний суфікс потрібен, бо ту саму статтю можуть одночасно
+    # рендерити кілька каналів, і файли одного рендеру не повинні перезаписувати файли іншого
+    image_name = f"{pic_url.split('/')[-1]}_{uuid.uuid4().hex}"
     image_save_path = f"{PATH}/{image_name}.jpg"
     output_image_path = f"{PATH}/output_{image_name}.jpg"
 
+    try:
+        return await _render_picture(pic_url, text_to_image, image_save_path, output_image_path, need_to_resize)
+    finally:
+        # Завантажений оригінал більше не потрібен; результат переноситься в outbox (store_outbox_image)
+        if os.path.exists(image_save_path):
+            os.remove(image_save_path)
+
+
+async def _render_picture(pic_url: str, text_to_image: str, image_save_path: str, output_image_path: str,
+                          need_to_resize: bool) -> str:
     # Якщо немає зображення, використовуємо зображення з котиком
     if 'None' in pic_url or not pic_url:
         pic_url = 'https://cdn2.thecatapi.com/images/YQtmOXP0_.jpg'
@@ -63,11 +79,10 @@ async def picture_process(pic_url: str, text_to_image: str, need_to_resize: bool
 
 
 async def download_image(image_url, save_path):
-    async with aiohttp.ClientSession() as session:
-        async with session.get(image_url) as response:
-            if response.status == 200:
-                async with aiofiles.open(save_path, 'wb') as f:
-                    await f.write(await response.read())
+    async with http_client.session().get(image_url) as response:
+        if response.status == 200:
+            async with aiofiles.open(save_path, 'wb') as f:
+                await f.write(await response.read())
 
 
 def add_text_with_gradient(image_path, text, output_path, font_path='', font_size=24):
@@ -245,12 +260,13 @@ def create_random_image_with_text(text, output_path, width=800, height=600):
     image.save(output_path)
 
 
-async def main(topic, channel=None):
+async def main(topic, channel=None, news_list=None):
     """
     Основна функція для публікації новин в потрібні канали Telegram.
+    news_list - спільний для тіку список кандидатів новин за темою (необов'язково).
     """
     # Отримуємо новини
-    responses = await get_news.main(request=topic, channel=channel, search_type='standart')
+    responses = await get_news.main(request=topic, channel=channel, search_type='standart', news_list=news_list)
     not_image = 'https://cdn2.thecatapi.com/images/YQtmOXP0_.jpg'
     themes_dict: dict = {'themes': responses}
     topic_text = themes_dict['themes'][topic].get('general_text')
@@ -272,12 +288,16 @@ async def main(topic, channel=None):
     if not os.path.exists(PATH):
         os.makedirs(PATH)
 
-    # Видаляємо файли, старіші 10 хвилин
-    delete_old_files(PATH, 10)
-    await asyncio.sleep(1)
+    # Видаляємо залишки старих рендерів не частіше, ніж раз на CLEANUP_INTERVAL, а не з кожного виклику:
+    # файли поточних рендерів мають унікальні імена й прибираються в picture_process
+    global _next_cleanup
+    if time.time() >= _next_cleanup:
+        _next_cleanup = time.time() + CLEANUP_INTERVAL
+        delete_old_files(PATH, OLD_FILES_MAX_AGE_MINUTES)
 
     # Завантажуємо зображення
-    output_image_path = await picture_process(pic_url=picture_url, text_to_image=topic_text)
+    async with stage_limit('render'):
+        output_image_path = await picture_process(pic_url=picture_url, text_to_image=topic_text)
 
     return output_image_path, topic_url
 
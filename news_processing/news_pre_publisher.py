@@ -2,204 +2,227 @@ from __future__ import annotations
 
 import asyncio
 import html
+import json
 import logging
 import time
-from datetime import datetime, timedelta
 
+from config import PUBLISH_CONCURRENCY
 from db_layer.db_factory import get_data_serice
-from news_processing.news_API import BingNewsAPI
+from news_processing.news_API import news_api as get_news
 from news_processing.news_image_processing import main as get_image_news
-from news_processing.news_publisher import publish_news_standart, publish_news_one_picture, publish_news_digest
+from news_processing.outbox import outbox_sender, store_outbox_image
 
-get_news = BingNewsAPI()
+# Усі типи підписок (standart, picture, digest) шукають новини через Bing Web Search
+NEWS_SEARCH_TYPE = 'standart'
 
 
-async def is_time_to_publish(last_published_time, publish_frequency, status, news_id, db):
+class TopicCandidates:
     """
-    Перевіряє, чи можна публікувати новину на основі часу її публікації.
+    Кандидати новин у межах одного тіку.
+    Для кожної пари (тема, тип пошуку) запит до Bing виконується один раз,
+    а всі канали з цією темою отримують спільний список і вибирають з нього свою статтю.
+    Мова запиту визначається самою темою (профіль запиту в BingNewsAPI), тому окремо в ключ не входить.
     """
-    try:
-        pub_dates = await db.get_publish_date(news_id)
-        pub_times = await db.get_publish_time(news_id)
-        now = datetime.now()
-        last_pub_time = datetime.strptime(last_published_time, "%Y-%m-%d %H:%M:%S")
-
-        if not pub_dates and not pub_times:
-            return False
-
-        if status != 'yes':
-            return False
-
-        is_time = False  # Стандартно ініціалізуємо як False
-
-        for pub_date in pub_dates:
-            for pub_time in pub_times:
-                sended = await db.get_sended_status(news_id, pub_time[0])
-
-                # Перевірка на "щодня"
-                if pub_date[0] == 'everyday':
-                    if pub_time[0] == 'every--hour':
-                        is_time = now - last_pub_time >= timedelta(hours=1)
-                    elif pub_time[0] == 'every-3-hour':
-                        is_time = now - last_pub_time >= timedelta(hours=3)
-                    elif pub_time[0] == 'every-6-hour':
-                        is_time = now - last_pub_time >= timedelta(hours=6)
-                    else:
-                        if sended[0] == 0:
-                            hour, minute = map(int, pub_time[0].split(':'))
-                            target_time = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
-                            is_time = now >= target_time
-                            if is_time:
-                                await db.set_sended_status_true(news_id, pub_time[0])
-                # Перевірка на конкретну дату
-                else:
-                    pub_date_obj = datetime.strptime(pub_date[0], "%Y-%m-%d").date()
-                    if pub_date_obj <= now.date():
-                        if pub_time[0] == 'every--hour':
-                            is_time = now - last_pub_time >= timedelta(hours=1)
-                        elif pub_time[0] == 'every-3-hour':
-                            is_time = now - last_pub_time >= timedelta(hours=3)
-                        elif pub_time[0] == 'every-6-hour':
-                            is_time = now - last_pub_time >= timedelta(hours=6)
-                        else:
-                            if sended[0] == 0:
-                                hour, minute = map(int, pub_time[0].split(':'))
-                                target_time = datetime.combine(now.date(), datetime.min.time()).replace(
-                                    hour=hour, minute=minute, second=0, microsecond=0
-                                )
-                                is_time = now >= target_time
-                                if is_time:
-                                    await db.set_sended_status_true(news_id, pub_time[0])
-
-                # Якщо час публікації настав, виходимо з циклів
-                if is_time:
-                    break
-            if is_time:
-                break
-
-        return is_time
 
-    except Exception as e:
-        print(f"Помилка під час перевірки часу публікації (ID {news_id}): {e}")
-        return False
+    def __init__(self):
+        self._tasks = {}
 
+    def get(self, topic: str, search_type: str = NEWS_SEARCH_TYPE) -> asyncio.Task:
+        key = (topic, search_type)
+        task = self._tasks.get(key)
+        if task is None:
+            task = self._tasks[key] = asyncio.create_task(get_news.fetch_candidates(topic, search_type=search_type))
+        return task
 
 
-async def time_check(bot):
-    # Підключаємося до бази даних
-    async with get_data_serice() as db:
+async def load_query_profile(db, item: dict, topic: str):
+    """
+    Бере профіль запиту теми зі збереженого в підписці (поле 'query_profile' з get_publishing_schedules).
+    Якщо профілю ще немає або тему змінено, він обчислюється один раз і зберігається з підпискою.
+    """
+    stored = item.get('query_profile')
+    if stored is not None and stored[0] == topic:
+        get_news.query_profiles.put(*stored)
+        return
 
-        # Отримуємо всі записи, що відповідають умовам публікації
-        data = await db.get_channels_for_publishing()
+    profile = get_news.query_profiles.get(topic)
+    await db.save_query_profile(item['id'], topic, profile.language, profile.region, profile.is_category)
+    item['query_profile'] = (topic, profile.language, profile.region, profile.is_category)
 
-        # Створюємо словник для digest новин за користувачами та каналами
-        digest_topics_by_user_and_channel = {}
+
+async def publish_items(bot, items: list[dict]) -> set:
+    """
+    Публікує підписки, час яких вже настав.
+    Приймає записи у форматі SQLDataService.get_channels_for_publishing.
+    Канали обробляються паралельно (не більше PUBLISH_CONCURRENCY одночасно),
+    а публікації в межах одного каналу - послідовно і в початковому порядку.
+    Повертає множину ID підписок, публікацію яких поставлено в outbox; решту треба повторити.
+    """
+    items_by_channel = {}
+    for item in items:
+        items_by_channel.setdefault(item['channel_name'], []).append(item)
+
+    limit = asyncio.Semaphore(PUBLISH_CONCURRENCY)
+    candidates = TopicCandidates()
+    results = await asyncio.gather(*(
+        publish_channel_items(bot, channel, channel_items, limit, candidates)
+        for channel, channel_items in items_by_channel.items()
+    ), return_exceptions=True)
+
+    published = set()
+    for channel, result in zip(items_by_channel, results):
+        if isinstance(result, BaseException):
+            logging.error(f"Publishing to channel {channel} failed: {result!r}")
+        else:
+            published.update(result)
+    return published
+
+
+async def publish_channel_items(bot, channel: str, items: list[dict], limit: asyncio.Semaphore,
+                                candidates: TopicCandidates) -> set:
+    """Послідовно публікує всі записи одного каналу. Повертає ID успішно опублікованих підписок."""
+    published = set()
+    async with limit, get_data_serice() as db:
+        # Створюємо словник для digest новин за користувачами
+        digest_topics_by_user = {}
 
         # Обробляємо кожен запис
-        for item in data:
+        for item in items:
             topic_id = item['id']
             topic = item['topic_name']  # Тема новини
             topic = html.escape(topic)
-            channel = item['channel_name']  # Канал для публікації
+            await load_query_profile(db, item, topic)
             user_id = item['user_id']  # ID користувача
-            publish_frequency = item['publish_frequency']  # Частота публікацій
             news_type = item['news_type']  # Тип новини (standart, picture, digest)
-            last_pub_time = item['last_pub_time']  # Час останньої публікації
             poll = item['add_poll']  # yes | no
             poll_text = item['poll_text']
-            status = item['is_active']
-
-            # Перевіряємо, чи час публікації відповідає частоті публікації
-            is_time = await is_time_to_publish(last_pub_time, publish_frequency, status, news_id=topic_id, db=db)
-
-            if is_time and status == 'yes':
-                # Якщо тип новини - standart, викликаємо функцію publish_standart_news
-                if news_type == 'standart':
-                    await publish_standart_news(db, bot, topic=topic, channel=channel, poll=poll,
-                                                poll_text=poll_text, user_id=user_id, topic_id=topic_id)
-
-                # Якщо тип новини - picture, викликаємо функцію publish_picture_news
-                elif news_type == 'picture':
-                    await publish_picture_news(bot, topic=topic, channel=channel, poll=poll,
-                                               poll_text=poll_text, user_id=user_id, topic_id=topic_id, db=db)
+            due_at = item.get('due_at_utc', '')  # Запланований час публікації (UTC) для метрики запізнення
+
+            # Якщо тип новини - standart, викликаємо функцію publish_standart_news
+            if news_type == 'standart':
+                news_list = await candidates.get(topic)
+                if await publish_standart_news(db, bot, topic=topic, channel=channel, poll=poll,
+                                               poll_text=poll_text, user_id=user_id, topic_id=topic_id,
+                                               news_list=news_list, due_at=due_at):
+                    published.add(topic_id)
+
+            # Якщо тип новини - picture, викликаємо функцію publish_picture_news
+            elif news_type == 'picture':
+                news_list = await candidates.get(topic)
+                if await publish_picture_news(bot, topic=topic, channel=channel, poll=poll,
+                                              poll_text=poll_text, user_id=user_id, topic_id=topic_id, db=db,
+                                              news_list=news_list, due_at=due_at):
+                    published.add(topic_id)
+
+            # Якщо тип новини - digest, групуємо digest новини за користувачем
+            elif news_type == 'digest':
+                if user_id not in digest_topics_by_user:
+                    digest_topics_by_user[user_id] = {
+                        'id': [],
+                        'topics': [],
+                        'news_lists': {},
+                        'poll': poll,
+                        'poll_text': poll_text,
+                        'due_at': due_at
+                    }
+
+                digest_topics_by_user[user_id]['topics'].append(topic)
+                digest_topics_by_user[user_id]['id'].append(topic_id)
+                # Запізнення дайджесту рахується від найранішого запланованого часу його тем
+                if due_at and (not digest_topics_by_user[user_id]['due_at'] or
+                               due_at < digest_topics_by_user[user_id]['due_at']):
+                    digest_topics_by_user[user_id]['due_at'] = due_at
+                digest_topics_by_user[user_id]['news_lists'][topic] = await candidates.get(topic)
 
-                # Якщо тип новини - digest
-                elif news_type == 'digest':
-                    # Групуємо digest новини за користувачем і каналом
-                    if user_id not in digest_topics_by_user_and_channel:
-                        digest_topics_by_user_and_channel[user_id] = {}
+        # Після проходження по всіх записах перевіряємо digest новини
+        for user_id, data in digest_topics_by_user.items():
+            topics = data['topics']
+            topic_id = data['id']
+            poll = data['poll']
+            poll_text = data['poll_text']
+            news_lists = data['news_lists']
+            due_at = data['due_at']
+
+            # Якщо є новини для публікації, викликаємо publish_digest_news
+            if len(topics) >= 2:
+                if await publish_digest_news(bot, topics=topics, channel=channel, poll=poll,
+                                             poll_text=poll_text, user_id=user_id, topics_id=topic_id,
+                                             news_lists=news_lists, due_at=due_at):
+                    published.update(topic_id)
+            else:
+                # Якщо менше двох тем для публікації, публікуємо як picture
+                topics = topics[0]
+                if await publish_picture_news(bot, topics, channel=channel, poll=poll,
+                                              poll_text=poll_text, user_id=user_id, topic_id=topic_id[0], db=db,
+                                              news_list=news_lists.get(topics), due_at=due_at):
+                    published.add(topic_id[0])
 
-                    if channel not in digest_topics_by_user_and_channel[user_id]:
-                        digest_topics_by_user_and_channel[user_id][channel] = {
-                            'id': [],
-                            'topics': []
-                        }
+    return published
 
-                    digest_topics_by_user_and_channel[user_id][channel]['topics'].append(topic)
-                    digest_topics_by_user_and_channel[user_id][channel]['id'].append(topic_id)
 
-        # Після проходження по всіх записах перевіряємо digest новини
-        for user_id, channels_data in digest_topics_by_user_and_channel.items():
-            for channel, data in channels_data.items():
-                topics = data['topics']
-                topic_id = data['id']
-
-                # Якщо є новини для публікації, викликаємо publish_digest_news
-                if len(topics) >= 2:
-                    await publish_digest_news(bot, topics=topics, channel=channel, poll=poll,
-                                              poll_text=poll_text, user_id=user_id, topics_id=topic_id)
-                else:
-                    # Якщо менше двох тем для публікації, публікуємо як picture
-                    topics = topics[0]
-                    await publish_picture_news(bot, topics, channel=channel, poll=poll,
-                                               poll_text=poll_text, user_id=user_id, topic_id=topic_id[0], db=db)
+async def enqueue_news(db, sub_ids: list, channel: str, user_id: str, news_type: str, payload: dict,
+                       due_at: str = '') -> None:
+    """
+    Зберігає відрендерену публікацію в outbox і лише після цього оновлює час останньої публікації.
+    Відправлення в Telegram (з повторними спробами) виконує OutboxSender.
+    due_at - запланований час публікації (UTC), від якого OutboxSender рахує запізнення.
+    """
+    await db.enqueue_publication(sub_ids, channel, user_id, news_type, json.dumps(payload, ensure_ascii=False),
+                                 due_at)
+    for sub_id in sub_ids:
+        await db.update_last_published_time(topic_id=sub_id)
+    outbox_sender.notify()
 
 
 async def publish_standart_news(db, bot, topic: str, channel: str, poll: str, poll_text: str,
-                                user_id: str, topic_id: str) -> None:
+                                user_id: str, topic_id: str, news_list: list | None = None, due_at: str = '') -> bool:
+    """Ставить стандартну новину в outbox; повертає False, якщо публікацію не вдалося підготувати."""
     try:
         print('try to publish standart news')
-        channel_url = channel
-        responses = await get_news.main(request=topic, channel=channel, search_type='standart')
+        responses = await get_news.main(request=topic, channel=channel, search_type=NEWS_SEARCH_TYPE,
+                                        news_list=news_list)
         themes_dict: dict = {'themes': responses}
         topic_text = themes_dict['themes'][topic].get('general_text')
         topic_url = themes_dict['themes'][topic].get('url')
         topic_url = f' <a href="{topic_url}"><b> Джерело </b></a>'
 
-        await asyncio.gather(
-            publish_news_standart(bot, channel_url, topic_text, topic_url, topic, poll=poll, poll_text=poll_text,
-                                  user_id=user_id),
-            db.update_last_published_time(topic_id=topic_id)
-        )
+        await enqueue_news(db, [topic_id], channel, user_id, 'standart', {
+            'topic': topic,
+            'news': topic_text,
+            'source': topic_url,
+            'poll': poll,
+            'poll_text': poll_text,
+        }, due_at)
+        return True
     except Exception as e:
         logging.exception('Publish_news Exception in publish_standart_news', exc_info=e)
+        return False
 
 
 async def publish_picture_news(bot, topic: str, channel: str, poll: str, poll_text: str,
-                               user_id: str, topic_id: str, db: AsyncDatabase) -> None:
+                               user_id: str, topic_id: str, db: AsyncDatabase, news_list: list | None = None,
+                               due_at: str = '') -> bool:
+    """Ставить новину з картинкою в outbox; повертає False, якщо публікацію не вдалося підготувати."""
     try:
-        news_path, topic_url = await get_image_news(topic=topic, channel=channel)
-
-        # Створення паралельних задач
-        publish_task = asyncio.create_task(
-            publish_news_one_picture(bot, channel_id=channel, news_path=news_path,
-                                     source=topic_url, topic=topic, poll=poll, poll_text=poll_text, user_id=user_id))
-        db_task = asyncio.create_task(db.update_last_published_time(topic_id=topic_id))
-
-        # Очікування завершення публікації новин
-        await publish_task
-        await asyncio.sleep(1)  # Можеш видалити це, якщо нема потреби в затримці
-        # Очікування завершення оновлення бази даних
-        await db_task
-
-
+        news_path, topic_url = await get_image_news(topic=topic, channel=channel, news_list=news_list)
+
+        await enqueue_news(db, [topic_id], channel, user_id, 'picture', {
+            'topic': topic,
+            'news_path': store_outbox_image(news_path),
+            'source': topic_url,
+            'poll': poll,
+            'poll_text': poll_text,
+        }, due_at)
+        return True
     except Exception as e:
         logging.exception('Publish_news Exception in publish_picture_news', exc_info=e)
-        pass
+        return False
 
 
 async def publish_digest_news(bot, channel: str, topics: list[str], poll: str, poll_text: str,
-                              user_id: str, topics_id: list) -> None:
+                              user_id: str, topics_id: list, news_lists: dict | None = None, due_at: str = '') -> bool:
+    """Ставить дайджест у outbox; повертає False, якщо жодної теми не вдалося підготувати."""
+    news_lists = news_lists or {}
     async with get_data_serice() as db:
         try:
             path_links = {}
@@ -207,33 +230,26 @@ async def publish_digest_news(bot, channel: str, topics: list[str], poll: str, p
             # Отримуємо новини для кожної теми
             for topic in topics:
                 try:
-                    news_path, topic_url = await get_image_news(topic=topic, channel=channel)
-                    path_links[topic] = [news_path, topic_url]
+                    news_path, topic_url = await get_image_news(topic=topic, channel=channel,
+                                                                news_list=news_lists.get(topic))
+                    path_links[topic] = [store_outbox_image(news_path), topic_url]
                 except Exception as e:
                     logging.exception(f"Error during getting news for topic {topic}:", exc_info=e)
                     continue
 
-            # Публікуємо всі новини разом в один канал
+            # Ставимо дайджест у чергу на відправлення в один канал
             if path_links:
                 if channel:
-                    try:
-                        # Викликаємо функцію публікації
-                        await publish_news_digest(bot, channel_id=channel, data=path_links, topics=topics,
-                                                  poll=poll, poll_text=poll_text, user_id=user_id)
-
-                        # Оновлюємо час публікації тільки для справжніх тем
-                        for topic in topics:
-                            try:
-                                for topic_id in topics_id:
-                                    await db.update_last_published_time(topic_id=topic_id)
-                            except Exception as e:
-                                logging.exception(f"Error updating last published time for {topic}", exc_info=e)
-                                continue
-                    except Exception as e:
-                        logging.exception("Error during publishing news digest", exc_info=e)
-                else:
-                    logging.warning("Channel not found for publication.")
+                    await enqueue_news(db, list(topics_id), channel, user_id, 'digest', {
+                        'topics': [topic for topic in topics if topic in path_links],
+                        'data': path_links,
+                        'poll': poll,
+                        'poll_text': poll_text,
+                    }, due_at)
+                    return True
+                logging.warning("Channel not found for publication.")
             else:
                 logging.warning("No valid news to publish in digest.")
         except Exception as e:
             logging.exception('Publish_news Exception', exc_info=e)
+    return False
@@ -7,53 +7,60 @@ import logging
 from aiogram import types
 from aiogram.types import FSInputFile
 
+from news_processing.rate_limiter import telegram_limiter
+
 
 
 async def publish_news_standart(bot, channel_id: str, news: str, source: str,
                                 topic: str, poll: str, poll_text: str, user_id: str, news_type: str = "text"):
     """
     Публікує новину в заданий канал Telegram з посиланням на джерело.
+    Помилка відправлення новини передається далі, щоб outbox міг повторити спробу.
     """
     try:
         topic_tag: str = topic.replace(" ", "_")
-        message: types.Message = await bot.send_message(
-            chat_id=channel_id,
+        message: types.Message = await telegram_limiter.send(
+            channel_id, bot.send_message,
             text=f"#{topic_tag}\n\n{news}\n\n{source}"
         )
-
-        if poll == 'yes':
-            await send_poll(bot, user_id, channel_id, message=message, poll_text=poll_text)
     except Exception as e:
         logging.exception(f"Не вдалося опублікувати новину в {channel_id}", exc_info=e)
+        raise
+
+    if poll == 'yes':
+        await send_poll_safely(bot, user_id, channel_id, message=message, poll_text=poll_text)
 
 
 async def publish_news_one_picture(bot, channel_id: str, news_path: str, user_id: str,
                                    source: str, topic: str, poll: str, poll_text: str, news_type: str = "image"):
     """
     Публікує фото-новину в заданий канал Telegram.
+    Помилка відправлення новини передається далі, щоб outbox міг повторити спробу.
     """
     try:
         topic_tag: str = topic.replace(" ", "_")
         photo = FSInputFile(news_path)
 
         # Відправляємо фото
-        message = await bot.send_photo(
-            chat_id=channel_id,
+        message = await telegram_limiter.send(
+            channel_id, bot.send_photo,
             photo=photo,
             caption=f"#{topic_tag} {source}",
             show_caption_above_media=True,
         )
-
-        if poll == 'yes':
-            await send_poll(bot, user_id, channel_id, message=message, poll_text=poll_text)
     except Exception as e:
         logging.exception(f"Не вдалося опублікувати новину в {channel_id}", exc_info=e)
+        raise
+
+    if poll == 'yes':
+        await send_poll_safely(bot, user_id, channel_id, message=message, poll_text=poll_text)
 
 
 async def publish_news_digest(bot, channel_id: str, data: dict, topics: list,
                               poll: str, poll_text: str, user_id: str, news_type: str = "digest"):
     """
     Публікує дайджест новин у вигляді групи медіа-файлів.
+    Помилка відправлення новини передається далі, щоб outbox міг повторити спробу.
     """
     try:
         media_digest = []
@@ -67,12 +74,24 @@ async def publish_news_digest(bot, channel_id: str, data: dict, topics: list,
             ))
 
         # Відправляємо групу медіа
-        await bot.send_media_group(chat_id=channel_id, media=media_digest)
-
-        if poll == 'yes':
-            await send_poll(bot, user_id, channel_id, message=None, poll_text=poll_text)
+        await telegram_limiter.send(channel_id, bot.send_media_group, media=media_digest, cost=len(media_digest))
     except Exception as e:
         logging.exception(f"Не вдалося опублікувати новину в {channel_id}", exc_info=e)
+        raise
+
+    if poll == 'yes':
+        await send_poll_safely(bot, user_id, channel_id, message=None, poll_text=poll_text)
+
+
+async def send_poll_safely(bot, user_id, channel_id, poll_text, message: types.Message | None):
+    """
+    Відправляє опитування після новини.
+    Новина вже опублікована, тому помилка опитування лише логується і не призводить до повторної відправки.
+    """
+    try:
+        await send_poll(bot, user_id, channel_id, message=message, poll_text=poll_text)
+    except Exception as e:
+        logging.exception(f"Не вдалося відправити опитування в {channel_id}", exc_info=e)
 
 
 async def send_poll(bot, user_id, channel_id, poll_text, message: types.Message | None):
@@ -84,7 +103,7 @@ async def send_poll(bot, user_id, channel_id, poll_text, message: types.Message
 
     # Валідація: опитування повинно містити питання і як мінімум дві відповіді
     if len(poll_list) < 3:
-        await bot.send_message(chat_id=user_id, text="Для опитування потрібно питання і хоча б дві відповіді.")
+        await telegram_limiter.send(user_id, bot.send_message, text="Для опитування потрібно питання і хоча б дві відповіді.")
         raise ValueError("Для опитування потрібно питання і хоча б дві відповіді.")
 
     question = poll_list[0]
@@ -92,15 +111,15 @@ async def send_poll(bot, user_id, channel_id, poll_text, message: types.Message
 
     # Відправляємо опитування
     if message:
-        await bot.send_poll(
-            chat_id=channel_id,
+        await telegram_limiter.send(
+            channel_id, bot.send_poll,
             question=question,
             options=answers,
             reply_to_message_id=message.message_id  # Це робить опитування "відповіддю" на повідомлення
         )
     else:
-        await bot.send_poll(
-            chat_id=channel_id,
+        await telegram_limiter.send(
+            channel_id, bot.send_poll,
             question=question,
             options=answers
         )
@@ -0,0 +1,212 @@
+import asyncio
+import json
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime
+
+from aiogram import Bot
+from config import (OUTBOX_MAX_ATTEMPTS, OUTBOX_BACKOFF_SECONDS, OUTBOX_BACKOFF_MAX_SECONDS,
+                    OUTBOX_LEASE_SECONDS, OUTBOX_POLL_SECONDS)
+from db_layer.db_factory import get_data_serice
+from news_processing.metrics import OUTBOX_DELAY_SECONDS, OUTBOX_RESULTS_TOTAL, PUBLICATION_LATENESS_SECONDS
+from news_processing.news_publisher import publish_news_standart, publish_news_one_picture, publish_news_digest
+
+# Папка для зображень, що чекають відправлення (не очищується delete_old_files)
+OUTBOX_PATH = os.path.abspath('tmp_pic/outbox/')
+
+
+def store_outbox_image(image_path: str) -> str:
+    """Переносить відрендерене зображення в папку outbox під унікальним ім'ям."""
+    os.makedirs(OUTBOX_PATH, exist_ok=True)
+    extension = os.path.splitext(image_path)[1] or '.jpg'
+    outbox_path = os.path.join(OUTBOX_PATH, f"{uuid.uuid4().hex}{extension}")
+    os.replace(image_path, outbox_path)
+    return outbox_path
+
+
+def _payload_images(news_type: str, payload: dict) -> list[str]:
+    if news_type == 'picture':
+        return [payload['news_path']]
+    if news_type == 'digest':
+        return [news_path for news_path, _ in payload['data'].values()]
+    return []
+
+
+def _remove_images(news_type: str, payload: dict):
+    for image_path in _payload_images(news_type, payload):
+        try:
+            os.remove(image_path)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logging.warning(f"Не вдалося видалити файл outbox {image_path}: {e}")
+
+
+def backoff_seconds(attempts: int) -> float:
+    """Експоненційна затримка перед наступною спробою: OUTBOX_BACKOFF_SECONDS * 2^(attempts-1)."""
+    return min(OUTBOX_BACKOFF_SECONDS * 2 ** max(attempts - 1, 0), OUTBOX_BACKOFF_MAX_SECONDS)
+
+
+class OutboxSender:
+    """
+    Відправник публікацій з таблиці Publish_outbox.
+    Контент потрапляє в outbox вже відрендереним, тому при збої Telegram повторюється лише відправлення,
+    без повторного пошуку, сумаризації та рендерингу.
+    Невдалі спроби повторюються з експоненційною затримкою; після OUTBOX_MAX_ATTEMPTS запис стає 'dead'.
+    """
+
+    def __init__(self):
+        self.bot = None
+        self.is_running = False
+        self.current_task = None
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+        self._loop = None
+        self._wakeup = None
+
+    async def _send(self, record: dict, payload: dict):
+        news_type = record['news_type']
+        channel = record['channel_name']
+        common = dict(poll=payload['poll'], poll_text=payload['poll_text'], user_id=record['user_id'])
+
+        if news_type == 'standart':
+            await publish_news_standart(self.bot, channel, payload['news'], payload['source'], payload['topic'],
+                                        **common)
+        elif news_type == 'picture':
+            await publish_news_one_picture(self.bot, channel_id=channel, news_path=payload['news_path'],
+                                           source=payload['source'], topic=payload['topic'], **common)
+        elif news_type == 'digest':
+            await publish_news_digest(self.bot, channel_id=channel, data=payload['data'], topics=payload['topics'],
+                                      **common)
+        else:
+            raise ValueError(f"Невідомий тип публікації '{news_type}'")
+
+    async def _deliver(self, db, record: dict):
+        if not await db.claim_outbox_publication(record['id'], self.worker_id, OUTBOX_LEASE_SECONDS):
+            return
+
+        attempts = record['attempts'] + 1
+        try:
+            payload = json.loads(record['payload'])
+        except ValueError as e:
+            logging.error(f"Пошкоджений запис outbox {record['id']}: {e}")
+            await db.mark_publication_failed(record['id'], attempts, None, str(e))
+            return
+
+        try:
+            await self._send(record, payload)
+        except Exception as e:
+            if attempts >= OUTBOX_MAX_ATTEMPTS:
+                OUTBOX_RESULTS_TOTAL.inc(result='dead')
+                logging.error(f"Публікацію outbox {record['id']} в {record['channel_name']} "
+                              f"не відправлено після {attempts} спроб, запис переведено в 'dead'")
+                await db.mark_publication_failed(record['id'], attempts, None, repr(e))
+                _remove_images(record['news_type'], payload)
+            else:
+                OUTBOX_RESULTS_TOTAL.inc(result='retry')
+                retry_in = backoff_seconds(attempts)
+                logging.warning(f"Спроба {attempts} відправлення outbox {record['id']} невдала, "
+                                f"повтор через {retry_in:.0f} с: {e}")
+                await db.mark_publication_failed(record['id'], attempts, retry_in, repr(e))
+            return
+
+        await db.mark_publication_sent(record['id'])
+        OUTBOX_RESULTS_TOTAL.inc(result='sent')
+        sent_at = datetime.utcnow()
+        created_at = datetime.strptime(str(record['created_at'])[:19], '%Y-%m-%d %H:%M:%S')
+        OUTBOX_DELAY_SECONDS.observe(max((sent_at - created_at).total_seconds(), 0))
+        if record.get('due_at'):
+            # Повне запізнення: від налаштованого часу публікації до фактичного відправлення в Telegram
+            due_at = datetime.strptime(str(record['due_at'])[:19], '%Y-%m-%d %H:%M:%S')
+            PUBLICATION_LATENESS_SECONDS.observe(max((sent_at - due_at).total_seconds(), 0))
+        _remove_images(record['news_type'], payload)
+
+    async def _deliver_channel(self, records: list[dict]):
+        """Відправляє записи одного каналу послідовно, щоб зберегти порядок публікацій."""
+        async with get_data_serice() as db:
+            for record in records:
+                try:
+                    await self._deliver(db, record)
+                except Exception as e:
+                    logging.exception(f"Помилка обробки запису outbox {record['id']}", exc_info=e)
+
+    async def _drain(self):
+        async with get_data_serice() as db:
+            records = await db.get_ready_publications()
+
+        records_by_channel = {}
+        for record in records:
+            records_by_channel.setdefault(record['channel_name'], []).append(record)
+
+        await asyncio.gather(*(self._deliver_channel(channel_records)
+                               for channel_records in records_by_channel.values()))
+
+    async def _sleep_until_next(self):
+        timeout = OUTBOX_POLL_SECONDS
+        async with get_data_serice() as db:
+            next_attempt_at = await db.get_next_publication_attempt()
+        if next_attempt_at:
+            next_attempt = datetime.strptime(str(next_attempt_at)[:19], '%Y-%m-%d %H:%M:%S')
+            timeout = min(max((next_attempt - datetime.utcnow()).total_seconds(), 0), timeout)
+
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _run(self):
+        while self.is_running:
+            try:
+                self._wakeup.clear()
+                await self._drain()
+                await self._sleep_until_next()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.exception("Outbox sender error occurred", exc_info=e)
+                await asyncio.sleep(OUTBOX_POLL_SECONDS)
+
+    def notify(self):
+        """Будить відправника після додавання нових записів. Безпечно викликати з будь-якого потоку."""
+        loop, wakeup = self._loop, self._wakeup
+        if loop is None or wakeup is None:
+            return
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+
+        if running_loop is loop:
+            wakeup.set()
+        else:
+            try:
+                loop.call_soon_threadsafe(wakeup.set)
+            except RuntimeError:
+                logging.debug("Outbox loop is closed, notification skipped")
+
+    async def start(self, bot: Bot):
+        if self.is_running:
+            return
+
+        self.bot = bot
+        self.is_running = True
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self.current_task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self.is_running = False
+        if self.current_task:
+            self.current_task.cancel()
+            try:
+                await self.current_task
+            except asyncio.CancelledError:
+                pass
+            self.current_task = None
+        self._loop = None
+
+
+# Створюємо глобальний об'єкт відправника
+outbox_sender = OutboxSender()
@@ -1,46 +1,116 @@
 import asyncio
+import hashlib
+import json
 import logging
-from functools import partial
-from openai import AzureOpenAI
-import os
-from dotenv import load_dotenv
-from deep_translator import GoogleTranslator
-import requests
-from news_processing.scrapers import WebScraper as ws
+import re
+from config import SUMMARY_CACHE_TTL_SECONDS, SUMMARY_CACHE_MAX_ITEMS, LLM_INPUT_TOKEN_BUDGET
+from news_processing.article_prefilter import prefilter
+from news_processing.fallback_translator import fallback_translator
+from news_processing.http_client import http_client
+from news_processing.llm_gateway import llm_gateway
+from news_processing.metrics import registry, Counter, Histogram
+from news_processing.response_cache import ResponseCache
+from news_processing.scrapers import WebScraper as ws, truncate_to_tokens, estimate_tokens
+
+
+SCRAPED_PAGES_TOTAL = registry.register(Counter(
+    'news_scraped_pages_total', 'Article pages scraped by extraction method', ('method',)))
+LLM_INPUT_TOKENS = registry.register(Histogram(
+    'news_llm_input_tokens', 'Estimated tokens per article: downloaded page HTML vs. article text sent to the LLM',
+    (100, 250, 500, 1000, 2000, 3000, 5000, 10000, 25000, 50000, 100000), ('source',)))
+
+# Мінімальна довжина тексту статті, витягнутого зі статичної сторінки; коротший текст означає, що вміст
+# рендериться JavaScript і сторінку треба відкрити в браузері
+MIN_STATIC_TEXT_LENGTH = 500
+# Таймаут завантаження сторінки статті (секунди)
+PAGE_FETCH_TIMEOUT = 10
+# Максимальна довжина одного сніпета в пакетній класифікації (символи)
+BATCH_SNIPPET_LENGTH = 2000
+# Версія промптів LLM; її треба збільшити після зміни промптів, щоб не повертати старі відповіді з кешу
+PROMPT_VERSION = 1
+
+
+def _digest(value) -> str:
+    return hashlib.sha256(str(value).encode()).hexdigest()
+
+
+def _parse_verdicts(answer: str, count: int) -> list[str] | None:
+    """Розбирає JSON-масив булевих вердиктів з відповіді LLM; None, якщо формат чи кількість не збігаються."""
+    match = re.search(r'\[.*]', answer or '', re.DOTALL)
+    if match is None:
+        return None
+    try:
+        verdicts = json.loads(match.group(0))
+    except ValueError:
+        return None
+    if len(verdicts) != count or not all(isinstance(verdict, bool) for verdict in verdicts):
+        return None
+    return [str(verdict) for verdict in verdicts]
 
 
 class WebScraperTranslator:
     def __init__(self):
-        load_dotenv()
-        self.client = AzureOpenAI(
-            api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-            api_version="2024-02-01",
-            azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT")
-        )
+        # Відповіді LLM за (хеш URL, хеш вмісту, мова, версія промпту), спільні для каналів, воркерів і перезапусків
+        self.summary_cache = ResponseCache('summary', ttl=SUMMARY_CACHE_TTL_SECONDS,
+                                           max_items=SUMMARY_CACHE_MAX_ITEMS)
 
     @staticmethod
-    def is_dynamic_site(url):
-        response = requests.get(url, timeout=5)
-        return len(response.text) < 1000 or "<script" in response.text.lower()
+    def is_dynamic_site(html: str, text: str) -> bool:
+        """Чи потрібен браузер: сторінка майже порожня або текст статті занадто короткий."""
+        return len(html) < 1000 or len(text) < MIN_STATIC_TEXT_LENGTH
+
+    async def scrape_article(self, url: str) -> str:
+        """
+        Текст статті за одне завантаження сторінки: той самий HTML використовується і для вибору способу
+        обробки, і для статичного витягування тексту. Playwright запускається лише для динамічних сторінок
+        або якщо сторінку не вдалося завантажити напряму.
+        З HTML береться лише основний текст статті (без меню, футерів, банерів cookie), обрізаний до
+        LLM_INPUT_TOKEN_BUDGET токенів.
+        """
+        html, text = '', ''
+        try:
+            html = await ws.fetch_page(url, timeout=PAGE_FETCH_TIMEOUT)
+            text = await ws.extract_article(html, max_tokens=LLM_INPUT_TOKEN_BUDGET)
+        except Exception as e:
+            logging.warning(f"Cannot fetch {url} directly, falling back to browser: {e!r}")
+
+        if html and not self.is_dynamic_site(html, text):
+            SCRAPED_PAGES_TOTAL.inc(method='static')
+            LLM_INPUT_TOKENS.observe(estimate_tokens(html), source='page_html')
+            return text
+
+        # Слот браузера займає лише сам рендеринг усередині scrape_dynamic_page, а не ті, хто чекає спільний результат
+        rendered_html = await ws.scrape_dynamic_page(url, return_html=True)
+        SCRAPED_PAGES_TOTAL.inc(method='browser')
+        dynamic_text = ''
+        if rendered_html:
+            LLM_INPUT_TOKENS.observe(estimate_tokens(rendered_html), source='page_html')
+            dynamic_text = await ws.extract_article(rendered_html, max_tokens=LLM_INPUT_TOKEN_BUDGET)
+        # Якщо браузер нічого не дав, краще короткий статичний текст, ніж жодного
+        return dynamic_text or text
 
     async def translate_string(self, content, url, from_lang='auto', to_lang='uk', raw_text=None):
         content_str = str(content)
 
+        cache_key = ResponseCache.make_key('translate', PROMPT_VERSION, _digest(url),
+                                           _digest((content_str, raw_text)), to_lang)
+        cached = await self.summary_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
         try:
-            check_site = self.is_dynamic_site(url)
-            text = await ws.scrape_dynamic_page(url) if check_site else ws.scrape_static_page(url)
+            text = await self.scrape_article(url)
         except Exception as e:
             logging.exception('Cannot scrape site', exc_info=e)
             text = content_str
 
-        text = text if text else content_str
-        if len(text) > 120000:
-            text = text[:120000]
-        if raw_text and len(raw_text) < 1000:
+        text = truncate_to_tokens(text if text else content_str, LLM_INPUT_TOKEN_BUDGET)
+        if isinstance(raw_text, str) and raw_text and len(raw_text) < 1000:
             text = raw_text
+        LLM_INPUT_TOKENS.observe(estimate_tokens(text), source='prompt')
 
         try:
-            response = self.client.chat.completions.create(
+            summary = await llm_gateway.chat(
                 messages=[
                     {
                         "role": "system",
@@ -55,26 +125,37 @@ class WebScraperTranslator:
                     },
                     {"role": "user", "content": f'Content to work with: "{text} and {content_str}". Max return text length is 450 characters.'}
                 ],
-                model="talex-mode",
             )
-            return response.choices[0].message.content
         except Exception as e:
             logging.exception("Translation failed with OpenAI API error", exc_info=e)
             try:
-                translated_text = GoogleTranslator(target=to_lang).translate(content_str)
-                return translated_text
+                return await fallback_translator.translate(content_str, to_lang)
             except Exception as e:
                 logging.exception("Google Translate also failed", exc_info=e)
                 return content_str
 
+        # Кешуються лише відповіді LLM: запасний переклад Google не повинен витіснити майбутнє резюме
+        await self.summary_cache.set(cache_key, summary)
+        return summary
+
     async def check_article(self, content, url=None):
+        verdict = prefilter(content, url)
+        if verdict is not None:
+            return verdict
+        return await self._check_article_llm(content, url)
+
+    async def _check_article_llm(self, content, url=None):
+        """Класифікація сніпета через LLM (з кешем) без локального фільтра: його вже застосував виклик вище."""
         text = content
+        cache_key = ResponseCache.make_key('check', PROMPT_VERSION, _digest(url), _digest(content))
+        cached = await self.summary_cache.get(cache_key)
+        if cached is not None:
+            return cached
 
-        if len(text) > 120000:
-            text = text[:120000]
+        text = truncate_to_tokens(text, LLM_INPUT_TOKEN_BUDGET)
 
         try:
-            response = self.client.chat.completions.create(
+            verdict = await llm_gateway.chat(
                 messages=[
                     {
                         "role": "system",
@@ -89,12 +170,75 @@ class WebScraperTranslator:
                     },
                     {"role": "user", "content": f'Content to analyze: "{text}"'}
                 ],
-                model="talex-mode",
             )
-            return response.choices[0].message.content
 
         except Exception as e:
             logging.exception("Translation failed with OpenAI API error", exc_info=e)
+            return None
+
+        await self.summary_cache.set(cache_key, verdict)
+        return verdict
+
+    async def check_articles(self, items: list[dict]) -> list[str | None]:
+        """
+        Пакетна версія check_article: класифікує сніпети кандидатів (general_text) одним запитом до LLM
+        і повертає вердикти 'True'/'False' у тому ж порядку, що й items.
+        Очевидні випадки (порожні сніпети, реклама, посилання) вирішує локальний фільтр без LLM;
+        вердикти з кешу не запитуються повторно; якщо відповідь не вдалося розібрати,
+        кандидати класифікуються по одному.
+        """
+        verdicts = [prefilter(item.get('general_text', ''), item.get('url')) for item in items]
+        cache_keys = [ResponseCache.make_key('check', PROMPT_VERSION, _digest(item.get('url')),
+                                             _digest(item.get('general_text', ''))) for item in items]
+        missing = []
+        for index, cache_key in enumerate(cache_keys):
+            if verdicts[index] is not None:
+                continue
+            verdicts[index] = await self.summary_cache.get(cache_key)
+            if verdicts[index] is None:
+                missing.append(index)
+
+        if len(missing) == 1:
+            item = items[missing[0]]
+            verdicts[missing[0]] = await self._check_article_llm(item.get('general_text', ''), item.get('url'))
+        elif missing:
+            snippets = '\n'.join(f'{number}. "{items[index].get("general_text", "")[:BATCH_SNIPPET_LENGTH]}"'
+                                 for number, index in enumerate(missing, 1))
+            try:
+                answer = await llm_gateway.chat(
+                    messages=[
+                        {
+                            "role": "system",
+                            "content": (
+                                'Your task is to analyze each of the provided numbered texts and classify it into one of '
+                                'two categories: "News Article" or "News Promotion/Advertisement". '
+                                'A text is true if it seems like a news article (with actual information, context, '
+                                'or events), and false if it looks like a promotion, a brief summary, or an advertisement '
+                                '(e.g., encouraging people to read news on a website or app). '
+                                'Return only a JSON array with one boolean per text, in the same order, e.g. [true, false].'
+                            )
+                        },
+                        {"role": "user", "content": f'Texts to analyze:\n{snippets}'}
+                    ],
+                )
+                parsed = _parse_verdicts(answer, len(missing))
+            except Exception as e:
+                logging.exception("Batch classification failed with OpenAI API error", exc_info=e)
+                parsed = None
+
+            if parsed is None:
+                logging.warning("Batch classification answer is unusable, classifying candidates one by one")
+                singles = await asyncio.gather(*(self._check_article_llm(items[index].get('general_text', ''),
+                                                                         items[index].get('url'))
+                                                 for index in missing))
+                for index, verdict in zip(missing, singles):
+                    verdicts[index] = verdict
+            else:
+                for index, verdict in zip(missing, parsed):
+                    verdicts[index] = verdict
+                    await self.summary_cache.set(cache_keys[index], verdict)
+
+        return verdicts
 
 
 # Usage example
@@ -104,6 +248,8 @@ async def main():
     content = "Example content"
     result = await scraper_translator.translate_string(content, url)
     print(result)
+    await http_client.close()
+    await llm_gateway.close()
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
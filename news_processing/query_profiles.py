@@ -0,0 +1,131 @@
+import random
+import time
+from collections import OrderedDict
+
+from langdetect import DetectorFactory, detect
+
+# langdetect за замовчуванням випадковий; фіксуємо seed, щоб одна тема завжди мала ту саму мову
+DetectorFactory.seed = 0
+
+# Літери, що однозначно вказують на мову запиту
+UNIQUE_CHARS = {
+    'uk': 'єіїґ',
+    'ru': 'ёыэъ',
+    'be': 'ўэ',
+    'de': 'äöüß'
+}
+
+MAX_PROFILES = 10_000
+
+
+def detect_query_language(query: str) -> str:
+    for lang, chars in UNIQUE_CHARS.items():
+        if any(char in query for char in chars):
+            return lang
+
+    try:
+        request_lang = detect(query)
+        return request_lang if request_lang in UNIQUE_CHARS else 'en'
+    except Exception:
+        return 'en'
+
+
+def build_params(query: str, language: str, region: str, search_type: str) -> dict:
+    params = {'q': query, 'cc': region, 'setLang': language, 'originalImg': True}
+
+    if search_type == 'news':
+        params['freshness'] = 'week'
+    elif search_type == 'standart':
+        params['answerCount'] = '2'
+        params['promote'] = 'News,Webpages'
+        params['q'] += '" news"'
+
+    return params
+
+
+class QueryProfile:
+    """
+    Заздалегідь обчислений план запиту до Bing для однієї теми.
+
+    language    - мова запиту (setLang)
+    region      - регіон (cc)
+    is_category - тема є категорією Bing News, тому шукається як search_type='news'
+    """
+    __slots__ = ('query', 'language', 'region', 'is_category', '_params')
+
+    def __init__(self, query: str, language: str, region: str, is_category: bool):
+        self.query = query
+        self.language = language
+        self.region = region
+        self.is_category = is_category
+        self._params = {}
+
+    def params(self, search_type: str) -> dict:
+        """Повертає копію параметрів запиту для search_type (обчислюються один раз)."""
+        params = self._params.get(search_type)
+        if params is None:
+            params = self._params[search_type] = build_params(self.query, self.language, self.region, search_type)
+        return dict(params)
+
+
+class QueryProfileCache:
+    """Кеш профілів запитів: мова, регіон і параметри обчислюються один раз на кожну окрему тему."""
+
+    def __init__(self, categories, language_region_map: dict, max_profiles: int = MAX_PROFILES):
+        self.categories = frozenset(categories)
+        self.language_region_map = language_region_map
+        self.max_profiles = max_profiles
+        self._profiles = OrderedDict()
+
+    def get(self, query: str) -> QueryProfile:
+        profile = self._profiles.get(query)
+        if profile is not None:
+            self._profiles.move_to_end(query)
+            return profile
+
+        language = detect_query_language(query)
+        return self.put(query, language, self.language_region_map.get(language, 'US'), query in self.categories)
+
+    def put(self, query: str, language: str, region: str, is_category: bool) -> QueryProfile:
+        """Додає готовий профіль (наприклад, збережений з підпискою), не визначаючи мову заново."""
+        profile = self._profiles.get(query)
+        if profile is not None and (profile.language, profile.region, profile.is_category) == (
+                language, region, is_category):
+            self._profiles.move_to_end(query)
+            return profile
+
+        profile = self._profiles[query] = QueryProfile(query, language, region, is_category)
+        self._profiles.move_to_end(query)
+        if len(self._profiles) > self.max_profiles:
+            self._profiles.popitem(last=False)
+        return profile
+
+
+# Мікробенчмарк: вартість планування одного запиту без кешу та з кешем профілів
+if __name__ == "__main__":
+    from news_processing.news_API import BingNewsAPI
+
+    api = BingNewsAPI()
+    topics = ['Спорт в Україні', 'Weather in London', 'Künstliche Intelligenz', 'Новости Москвы',
+              'politics', 'Python programming', 'Футбол', 'Economía de España', 'technology', 'Кіно']
+    topics += [f'{random.choice(topics)} {n}' for n in range(190)]
+    queries = [random.choice(topics) for _ in range(5_000)]
+
+    started = time.perf_counter()
+    for query in queries:
+        language = detect_query_language(query)
+        is_category = query in api.categories
+        build_params(query, language, api.language_region_map.get(language, 'US'),
+                     'news' if is_category else 'standart')
+    uncached = time.perf_counter() - started
+
+    profiles = QueryProfileCache(api.categories, api.language_region_map)
+    started = time.perf_counter()
+    for query in queries:
+        profile = profiles.get(query)
+        profile.params('news' if profile.is_category else 'standart')
+    cached = time.perf_counter() - started
+
+    print(f"{len(queries)} queries over {len(set(queries))} topics")
+    print(f"per query, detect + list lookup + params: {uncached / len(queries) * 1e6:.1f} us")
+    print(f"per query, cached profile:               {cached / len(queries) * 1e6:.1f} us")
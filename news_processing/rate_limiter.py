@@ -0,0 +1,113 @@
+import asyncio
+import logging
+import time
+
+from aiogram.exceptions import TelegramRetryAfter
+
+from config import (TELEGRAM_GLOBAL_RATE, TELEGRAM_CHAT_PER_MINUTE, TELEGRAM_CHAT_BURST, TELEGRAM_RETRY_ATTEMPTS,
+                    PUBLISH_WORKERS)
+
+# Після скількох чатів починаємо видаляти неактивні відра
+MAX_CHAT_BUCKETS = 10_000
+
+
+class TokenBucket:
+    """
+    Відро токенів: rate токенів за секунду, не більше capacity накопичених.
+    pause() блокує відро на час, який Telegram повернув у RetryAfter.
+    """
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated', 'paused_until')
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def is_idle(self) -> bool:
+        now = time.monotonic()
+        self._refill(now)
+        return self.tokens >= self.capacity and self.paused_until <= now
+
+    def pause(self, seconds: float):
+        now = time.monotonic()
+        self._refill(now)
+        self.tokens = 0
+        self.paused_until = max(self.paused_until, now + seconds)
+
+    async def acquire(self, cost: float = 1):
+        cost = min(cost, self.capacity)
+        while True:
+            now = time.monotonic()
+            self._refill(now)
+            if self.paused_until > now:
+                wait = self.paused_until - now
+            elif self.tokens >= cost:
+                self.tokens -= cost
+                return
+            else:
+                wait = (cost - self.tokens) / self.rate
+            await asyncio.sleep(wait)
+
+
+class TelegramRateLimiter:
+    """
+    Обмежувач відправлень у Telegram з глобальним відром (~30 повідомлень/с на бота)
+    та окремим відром для кожного чату (~20 повідомлень/хв для групи чи каналу).
+    Ліміт бота спільний для всіх процесів, тому кожен з workers процесів-відправників отримує
+    global_rate / workers повідомлень за секунду.
+    TelegramRetryAfter ставить відро чату на паузу, після чого відправлення повторюється.
+    Якщо чат перед відправленням не мав навантаження, обмеження стосується бота загалом,
+    і на паузу стає також глобальне відро.
+    """
+
+    def __init__(self, global_rate: float = TELEGRAM_GLOBAL_RATE, chat_per_minute: float = TELEGRAM_CHAT_PER_MINUTE,
+                 chat_burst: float = TELEGRAM_CHAT_BURST, retry_attempts: int = TELEGRAM_RETRY_ATTEMPTS,
+                 workers: int = PUBLISH_WORKERS):
+        process_rate = global_rate / max(workers, 1)
+        self.global_bucket = TokenBucket(process_rate, max(process_rate, 1))
+        self.chat_rate = chat_per_minute / 60
+        self.chat_burst = chat_burst
+        self.retry_attempts = retry_attempts
+        self._chats = {}
+
+    def _chat_bucket(self, chat_id) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if len(self._chats) >= MAX_CHAT_BUCKETS:
+                self._chats = {key: value for key, value in self._chats.items() if not value.is_idle()}
+            bucket = self._chats[chat_id] = TokenBucket(self.chat_rate, self.chat_burst)
+        return bucket
+
+    async def send(self, chat_id, method, *args, cost: int = 1, **kwargs):
+        """
+        Викликає метод бота (send_message, send_photo, ...) з дотриманням лімітів.
+        cost - кількість повідомлень, які створює виклик (для send_media_group - кількість медіа).
+        """
+        bucket = self._chat_bucket(chat_id)
+        attempt = 0
+        while True:
+            chat_was_idle = bucket.is_idle()
+            await bucket.acquire(cost)
+            await self.global_bucket.acquire(cost)
+            try:
+                return await method(*args, chat_id=chat_id, **kwargs)
+            except TelegramRetryAfter as e:
+                attempt += 1
+                if attempt > self.retry_attempts:
+                    raise
+                scope = 'бот' if chat_was_idle else 'чат'
+                logging.warning(f"Telegram flood control для {chat_id} ({scope}): пауза {e.retry_after} с "
+                                f"(спроба {attempt}/{self.retry_attempts})")
+                bucket.pause(e.retry_after)
+                if chat_was_idle:
+                    self.global_bucket.pause(e.retry_after)
+
+
+# Спільний обмежувач для всіх відправлень процесу
+telegram_limiter = TelegramRateLimiter()
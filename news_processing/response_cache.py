@@ -0,0 +1,174 @@
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+
+import aiosqlite
+
+from config import RESPONSE_CACHE_PATH, RESPONSE_CACHE_MEMORY_ITEMS
+from news_processing.metrics import registry, Counter
+
+RESPONSE_CACHE_TOTAL = registry.register(Counter(
+    'news_response_cache_total', 'Response cache lookups by cache and result', ('cache', 'result')))
+
+# Як часто (секунди) видаляти прострочені записи з SQLite
+PURGE_INTERVAL = 600
+
+
+class CacheConnections:
+    """
+    Спільні з'єднання aiosqlite до файлів кешу: одне з'єднання на файл для event loop процесу,
+    щоб get/set не відкривали файл і не створювали потік aiosqlite на кожен виклик.
+    Таблиця Response_cache створюється під час першого підключення. З'єднання закриваються через close() при зупинці.
+    """
+
+    def __init__(self):
+        self._connections = {}  # шлях до файлу -> (event loop, задача підключення)
+
+    @staticmethod
+    async def _open(db_path: str) -> aiosqlite.Connection:
+        db = await aiosqlite.connect(db_path)
+        await db.execute('PRAGMA journal_mode=WAL')
+        await db.execute('''
+            CREATE TABLE IF NOT EXISTS Response_cache (
+                cache_name TEXT NOT NULL,
+                cache_key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                PRIMARY KEY (cache_name, cache_key)
+            )
+        ''')
+        await db.commit()
+        return db
+
+    async def get(self, db_path: str) -> aiosqlite.Connection:
+        """Повертає з'єднання поточного event loop до db_path (підключається за потреби)."""
+        loop = asyncio.get_running_loop()
+        entry = self._connections.get(db_path)
+        if entry is not None and entry[0] is not loop:
+            logging.warning(f"Response cache connection to {db_path} belongs to another event loop, reconnecting")
+            await self._close_entry(entry)
+            entry = None
+        if entry is None or (entry[1].done() and (entry[1].cancelled() or entry[1].exception() is not None)):
+            # Одночасні виклики чекають одне підключення; невдале підключення повторюється наступного разу
+            entry = self._connections[db_path] = (loop, loop.create_task(self._open(db_path)))
+        return await asyncio.shield(entry[1])
+
+    @staticmethod
+    async def _close_entry(entry):
+        _, task = entry
+        if not task.done():
+            task.cancel()
+            return
+        if task.cancelled() or task.exception() is not None:
+            return
+        try:
+            await task.result().close()
+        except Exception as e:
+            logging.warning(f"Cannot close response cache connection: {e}")
+
+    async def close(self):
+        connections, self._connections = self._connections, {}
+        for entry in connections.values():
+            await self._close_entry(entry)
+
+
+# Створюємо глобальний набір з'єднань кешу процесу
+cache_connections = CacheConnections()
+
+
+class ResponseCache:
+    """
+    Дворівневий кеш відповідей з TTL.
+    Перший рівень - LRU-словник у пам'яті процесу, другий - таблиця Response_cache у окремому файлі SQLite,
+    тому кеш спільний для воркерів і переживає перезапуск бота.
+    Значення мають серіалізуватися в JSON.
+    max_items обмежує кількість записів кешу в SQLite. Обмеження застосовується під час очищення
+    (раз на PURGE_INTERVAL секунд або після max_items записів цього процесу з попереднього очищення),
+    тож між очищеннями таблиця може тимчасово містити більше записів; видаляються ті, що спливають раніше.
+    """
+
+    def __init__(self, name: str, ttl: int, db_path: str = RESPONSE_CACHE_PATH,
+                 max_memory_items: int = RESPONSE_CACHE_MEMORY_ITEMS, max_items: int | None = None):
+        self.name = name
+        self.ttl = ttl
+        self.db_path = db_path
+        self.max_memory_items = max_memory_items
+        self.max_items = max_items
+        self._memory = OrderedDict()  # ключ -> (expires_at, значення)
+        self._next_purge = 0.0
+        self._writes_since_purge = 0
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        return json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+
+    def _remember(self, key: str, expires_at: float, value):
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    async def get(self, key: str):
+        """Повертає значення з кешу або None, якщо його немає чи TTL сплив."""
+        now = time.time()
+        cached = self._memory.get(key)
+        if cached is not None:
+            if cached[0] > now:
+                self._memory.move_to_end(key)
+                RESPONSE_CACHE_TOTAL.inc(cache=self.name, result='memory_hit')
+                return cached[1]
+            del self._memory[key]
+
+        try:
+            db = await cache_connections.get(self.db_path)
+            async with db.execute('''
+                SELECT value, expires_at
+                FROM Response_cache
+                WHERE cache_name = ? AND cache_key = ? AND expires_at > ?
+            ''', (self.name, key, now)) as cursor:
+                row = await cursor.fetchone()
+        except Exception as e:
+            logging.error(f"Помилка читання кешу {self.name}: {e}")
+            row = None
+
+        if row is None:
+            RESPONSE_CACHE_TOTAL.inc(cache=self.name, result='miss')
+            return None
+
+        value = json.loads(row[0])
+        self._remember(key, row[1], value)
+        RESPONSE_CACHE_TOTAL.inc(cache=self.name, result='disk_hit')
+        return value
+
+    async def set(self, key: str, value, ttl: int | None = None):
+        now = time.time()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        self._remember(key, expires_at, value)
+
+        try:
+            db = await cache_connections.get(self.db_path)
+            await db.execute('''
+                INSERT OR REPLACE INTO Response_cache (cache_name, cache_key, value, expires_at)
+                VALUES (?, ?, ?, ?)
+            ''', (self.name, key, json.dumps(value, ensure_ascii=False), expires_at))
+            self._writes_since_purge += 1
+            if now >= self._next_purge or (self.max_items is not None and self._writes_since_purge >= self.max_items):
+                await db.execute('DELETE FROM Response_cache WHERE expires_at <= ?', (now,))
+                if self.max_items is not None:
+                    await db.execute('''
+                        DELETE FROM Response_cache
+                        WHERE cache_name = ? AND cache_key NOT IN (
+                            SELECT cache_key
+                            FROM Response_cache
+                            WHERE cache_name = ?
+                            ORDER BY expires_at DESC
+                            LIMIT ?
+                        )
+                    ''', (self.name, self.name, self.max_items))
+                self._next_purge = now + PURGE_INTERVAL
+                self._writes_since_purge = 0
+            await db.commit()
+        except Exception as e:
+            logging.error(f"Помилка запису в кеш {self.name}: {e}")
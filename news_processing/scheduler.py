@@ -1,53 +1,361 @@
 import asyncio
-from datetime import datetime, timedelta
+import heapq
+import itertools
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone, time as dt_time
+
 from aiogram import Bot
+from config import (PUBLISH_LEASE_SECONDS, SHARD_TAKEOVER_SECONDS, SHARD_TAKEOVER_CHECK_SECONDS,
+                    SCHEDULE_CHANGES_POLL_SECONDS)
 from db_layer.db_factory import get_data_serice
-from news_processing.news_pre_publisher import time_check
+from news_processing.metrics import (SCHEDULER_TICK_SECONDS, SCHEDULER_DUE_TOTAL, SCHEDULER_SKIPPED_TOTAL,
+                                     SCHEDULER_PUBLISHED_TOTAL, SCHEDULER_SCHEDULED, SCHEDULER_CLAIM_LAG_SECONDS)
+from news_processing.news_pre_publisher import publish_items
+from news_processing.schedule_rules import (next_publication_time, due_time_slot, schedule_cache, INTERVAL_RULES,
+                                           local_now)
+
+# Мінімальна пауза перед повторною спробою для тієї ж підписки
+MIN_RESCHEDULE_DELAY = timedelta(seconds=60)
 
 
 class NewsScheduler:
-    def __init__(self):
+    """
+    Планувальник публікацій.
+    Тримає мін-купу найближчих моментів публікації для кожної підписки і спить рівно до найближчого з них,
+    замість щохвилинного перегляду всієї таблиці News.
+
+    У режимі кількох воркерів (worker_count > 1) підписки розподіляються за sub_id % worker_count,
+    і воркер завантажує лише свій шард. Раз на SHARD_TAKEOVER_CHECK_SECONDS окремий запит шукає чужі підписки,
+    прострочені більш ніж на SHARD_TAKEOVER_SECONDS, щоб підхопити їх, якщо воркер-власник впав.
+    Зміни з діалогів (інший процес) доходять до воркерів через маркери в таблиці Schedule_changes,
+    які опитуються раз на SCHEDULE_CHANGES_POLL_SECONDS.
+    Кожна публікація перед виконанням атомарно захоплюється через таблицю Publish_lease.
+    """
+
+    def __init__(self, worker_index: int = 0, worker_count: int = 1):
         self.bot = None
         self.is_running = False
         self.current_task = None
 
-    async def get_next_publication_time(self):
+        self.worker_index = worker_index
+        self.worker_count = worker_count
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._next_changes_poll = None
+        self._next_takeover_check = None
+        self._last_change_id = None
+        self._pending_marks = set()
+
+        self._heap = []  # (due, seq, sub_id)
+        self._entries = {}  # sub_id -> (due, seq, item); запис у купі без пари тут вважається застарілим
+        self._counter = itertools.count()
+
+        self._lock = threading.Lock()
+        self._dirty = set()
+        self._reload_all = True
+        self._loop = None
+        self._wakeup = None
+
+    def _push(self, sub_id, item: dict, due: datetime):
+        seq = next(self._counter)
+        self._entries[sub_id] = (due, seq, item)
+        heapq.heappush(self._heap, (due, seq, sub_id))
+
+    def _is_current(self, seq, sub_id) -> bool:
+        entry = self._entries.get(sub_id)
+        return entry is not None and entry[1] == seq
+
+    def _pop_due(self, now: datetime) -> list[tuple[dict, datetime]]:
+        due_items = []
+        while self._heap and self._heap[0][0] <= now:
+            due, seq, sub_id = heapq.heappop(self._heap)
+            if self._is_current(seq, sub_id):
+                _, _, item = self._entries.pop(sub_id)
+                due_items.append((item, due))
+        return due_items
+
+    def get_next_publication_time(self) -> datetime | None:
+        """Повертає найближчий запланований момент публікації або None."""
+        while self._heap and not self._is_current(self._heap[0][1], self._heap[0][2]):
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    def owns(self, sub_id) -> bool:
+        """Чи належить підписка шарду цього воркера."""
+        return self.worker_count <= 1 or sub_id % self.worker_count == self.worker_index
+
+    def _schedule_item(self, item: dict, now: datetime, min_due: datetime | None = None):
+        self._entries.pop(item['id'], None)
+        try:
+            due = next_publication_time(item, now)
+        except Exception as e:
+            logging.error(f"Помилка під час обчислення часу публікації (ID {item['id']}): {e}")
+            return
+        if due is None or not self.owns(item['id']):
+            return
+        if min_due and due < min_due:
+            due = min_due
+        self._push(item['id'], item, due)
+
+    async def _load_all(self, db):
+        self._heap.clear()
+        self._entries.clear()
+        now = local_now()
+        for item in await db.get_publishing_schedules(shard_index=self.worker_index, shard_count=self.worker_count):
+            self._schedule_item(item, now)
+        logging.info(f"Scheduler loaded {len(self._entries)} active subscriptions")
+
+    async def _poll_changes(self, db):
+        """Переносить маркери змін розкладу з інших процесів у локальний список змінених підписок."""
+        if self._last_change_id is None:
+            # Під час запуску розклад завантажується повністю, тож старі маркери не потрібні
+            self._last_change_id = await db.get_last_schedule_change_id()
+            return
+        changes = await db.get_schedule_changes(self._last_change_id)
+        if not changes:
+            return
+        self._last_change_id = changes[-1][0]
+        with self._lock:
+            for _, sub_id in changes:
+                if sub_id == 0:
+                    self._reload_all = True
+                elif self.owns(sub_id) or sub_id in self._entries:
+                    schedule_cache.invalidate(sub_id)
+                    self._dirty.add(sub_id)
+
+    async def _take_over_overdue(self, db):
+        """Додає в купу чужі підписки, прострочені більш ніж на SHARD_TAKEOVER_SECONDS (воркер-власник не працює)."""
+        now = local_now()
+        takeover = timedelta(seconds=SHARD_TAKEOVER_SECONDS)
+        utc_now = now.astimezone(timezone.utc)
+        interval_deadlines = {rule: (utc_now - interval - takeover).strftime('%Y-%m-%d %H:%M:%S')
+                              for rule, interval in INTERVAL_RULES.items()}
+        # Фіксований час рахується в межах поточної доби, тому одразу після півночі нічого не перехоплюється
+        slot_deadline = (now - takeover).strftime('%H:%M') if (now - takeover).date() == now.date() else ''
+
+        overdue_ids = [sub_id for sub_id in await db.get_overdue_subscription_ids(
+            self.worker_index, self.worker_count, interval_deadlines, slot_deadline) if sub_id not in self._entries]
+        if not overdue_ids:
+            return
+        for item in await db.get_publishing_schedules(sub_ids=overdue_ids):
+            due = next_publication_time(item, now)
+            if due is not None and due + takeover <= now:
+                logging.warning(f"Scheduler {self.worker_id} takes over overdue subscription {item['id']}")
+                self._push(item['id'], item, due)
+
+    async def _refresh(self, db, sub_ids, min_due: datetime | None = None):
+        """Перечитує підписки sub_ids одним запитом і перераховує їх у купі; чужі та неактивні прибирає."""
+        owned = [sub_id for sub_id in sub_ids if self.owns(sub_id)]
+        items = {item['id']: item for item in await db.get_publishing_schedules(sub_ids=owned)} if owned else {}
+        now = local_now()
+        for sub_id in sub_ids:
+            item = items.get(sub_id)
+            if item is None:
+                self._entries.pop(sub_id, None)
+            else:
+                self._schedule_item(item, now, min_due)
+
+    async def _sync_shards(self):
+        """Опитує маркери змін і перевіряє прострочені чужі підписки, коли настав їх час."""
+        now = local_now()
+        poll_changes = now >= self._next_changes_poll
+        take_over = now >= self._next_takeover_check
+        if not poll_changes and not take_over:
+            return
+
         async with get_data_serice() as db:
-            times_list = await db.get_last_times_list()
-            if not times_list:
-                return None
-
-            earliest_time = min(
-                datetime.strptime(time['last_pub_time'], "%Y-%m-%d %H:%M:%S")
-                for time in times_list
-            )
-
-            now = datetime.now()
-            if earliest_time > now:
-                return earliest_time
-            elif earliest_time + timedelta(hours=1) > now:
-                return earliest_time + timedelta(hours=1)
+            if poll_changes:
+                self._next_changes_poll = now + timedelta(seconds=SCHEDULE_CHANGES_POLL_SECONDS)
+                await self._poll_changes(db)
+            if take_over:
+                self._next_takeover_check = now + timedelta(seconds=SHARD_TAKEOVER_CHECK_SECONDS)
+                await self._take_over_overdue(db)
+
+    async def _apply_updates(self):
+        with self._lock:
+            reload_all, self._reload_all = self._reload_all, False
+            dirty, self._dirty = self._dirty, set()
+
+        if not reload_all and not dirty:
+            return
+
+        async with get_data_serice() as db:
+            if reload_all:
+                schedule_cache.clear()
+                await self._load_all(db)
             else:
-                return now
+                await self._refresh(db, list(dirty))
 
-    async def schedule_next_publication(self):
-        if not self.is_running:
+    async def _claim_due_items(self, db, due_items: list[tuple[dict, datetime]]) -> list[tuple[dict, str]]:
+        """
+        Перечитує підписки, час яких настав, і захоплює їх публікацію в Publish_lease.
+        Повертає пари (підписка, due_at) лише для успішно захоплених публікацій.
+        """
+        now = local_now()
+        claimed = []
+        # Інший воркер міг уже опублікувати підписки, тому перечитуємо актуальний стан усіх одним запитом
+        fresh = {item['id']: item for item in
+                 await db.get_publishing_schedules(sub_ids=[stale_item['id'] for stale_item, _ in due_items])}
+        for stale_item, _ in due_items:
+            item = fresh.get(stale_item['id'])
+            if item is None:
+                SCHEDULER_SKIPPED_TOTAL.inc(reason='removed')
+                continue
+
+            due = next_publication_time(item, now)
+            if due is None or due > now:
+                SCHEDULER_SKIPPED_TOTAL.inc(reason='not_due')
+                self._schedule_item(item, now)
+                continue
+
+            # due має часовий пояс (last_pub_time у UTC, фіксований час у локальному), тож момент у UTC однозначний
+            due_at = due.astimezone(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+            if not await db.claim_publication(item['id'], due_at, self.worker_id, PUBLISH_LEASE_SECONDS):
+                SCHEDULER_SKIPPED_TOTAL.inc(reason='lease_held')
+                self._schedule_item(item, now, now + MIN_RESCHEDULE_DELAY)
+                continue
+
+            # Затримка захоплення відносно налаштованого часу; повне запізнення до відправлення рахує OutboxSender
+            SCHEDULER_CLAIM_LAG_SECONDS.observe(max((now - due).total_seconds(), 0))
+            # Запланований момент (UTC) передається в outbox разом з публікацією
+            item = dict(item, due_at_utc=due_at)
+
+            pub_time = due_time_slot(item, now)
+            if pub_time:
+                await db.set_sended_status_true(item['id'], pub_time)
+            claimed.append((item, due_at))
+        return claimed
+
+    async def _publish(self, due_items: list[tuple[dict, datetime]]):
+        async with get_data_serice() as db:
+            claimed = await self._claim_due_items(db, due_items)
+        if not claimed:
             return
 
-        next_time = await self.get_next_publication_time()
-        if next_time is None:
-            print("No publications scheduled.")
+        SCHEDULER_PUBLISHED_TOTAL.inc(len(claimed))
+        published = set()
+        try:
+            published = await publish_items(self.bot, [item for item, _ in claimed])
+        finally:
+            min_due = local_now() + MIN_RESCHEDULE_DELAY
+            async with get_data_serice() as db:
+                for item, due_at in claimed:
+                    # Виконаною позначається лише успішна публікація; невдалу можна захопити знову через
+                    # MIN_RESCHEDULE_DELAY з тим самим due_at (last_pub_time не змінився)
+                    if item['id'] in published:
+                        await db.release_publication(item['id'], due_at, self.worker_id)
+                    else:
+                        SCHEDULER_SKIPPED_TOTAL.inc(reason='publish_failed')
+                        await db.abandon_publication(item['id'], due_at, self.worker_id)
+                await self._refresh(db, [item['id'] for item, _ in claimed], min_due)
+
+    async def _sleep_until_next(self):
+        now = local_now()
+        wake_at = datetime.combine(now.date() + timedelta(days=1), dt_time.min, tzinfo=now.tzinfo)
+        next_time = self.get_next_publication_time()
+        if next_time and next_time < wake_at:
+            wake_at = next_time
+        for sync_at in (self._next_changes_poll, self._next_takeover_check):
+            if sync_at and sync_at < wake_at:
+                wake_at = sync_at
+
+        timeout = max((wake_at - now).total_seconds(), 0)
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _run(self):
+        last_checked_day = local_now().date()
+        while self.is_running:
+            try:
+                self._wakeup.clear()
+                tick_started = time.perf_counter()
+
+                # Новий день: скидаємо статус 'sended' і перебудовуємо розклад
+                current_day = local_now().date()
+                if current_day != last_checked_day:
+                    async with get_data_serice() as db:
+                        await db.set_all_sended_status_false()
+                    last_checked_day = current_day
+                    with self._lock:
+                        self._reload_all = True
+
+                await self._apply_updates()
+                if self.worker_count > 1:
+                    await self._sync_shards()
+                    await self._apply_updates()
+
+                due_items = self._pop_due(local_now())
+                if due_items:
+                    SCHEDULER_DUE_TOTAL.inc(len(due_items))
+                    await self._publish(due_items)
+                SCHEDULER_SCHEDULED.set(len(self._entries))
+                SCHEDULER_TICK_SECONDS.observe(time.perf_counter() - tick_started)
+                if due_items:
+                    continue
+
+                await self._sleep_until_next()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.exception("News scheduler error occurred", exc_info=e)
+                await asyncio.sleep(MIN_RESCHEDULE_DELAY.total_seconds())
+
+    def notify(self):
+        """Будить цикл планувальника. Безпечно викликати з будь-якого потоку."""
+        loop, wakeup = self._loop, self._wakeup
+        if loop is None or wakeup is None:
             return
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+
+        if running_loop is loop:
+            wakeup.set()
+        else:
+            try:
+                loop.call_soon_threadsafe(wakeup.set)
+            except RuntimeError:
+                logging.debug("Scheduler loop is closed, notification skipped")
 
-        now = datetime.now()
-        delay = (next_time - now).total_seconds()
+    def _mark_changed(self, sub_id: int):
+        """
+        Записує маркер зміни в Schedule_changes для воркерів в інших процесах.
+        Використовується, коли планувальник цього процесу не запущений (публікують окремі воркери).
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            logging.warning(f"Schedule change of subscription {sub_id} not recorded: no running event loop")
+            return
 
-        print(f"Next publication scheduled for: {next_time}")
-        await asyncio.sleep(delay)
-        await time_check(self.bot)
+        async def mark():
+            async with get_data_serice() as db:
+                await db.add_schedule_change(sub_id)
 
-        # Schedule the next publication
-        self.current_task = asyncio.create_task(self.schedule_next_publication())
+        task = loop.create_task(mark())
+        self._pending_marks.add(task)
+        task.add_done_callback(self._pending_marks.discard)
+
+    def reschedule(self, sub_id):
+        """
+        Позначає підписку як змінену (створена, відредагована, призупинена чи видалена).
+        Скомпільований розклад скидається, а запис буде перечитано з бази даних і перераховано в купі.
+        Якщо планувальник цього процесу не запущений, зміна передається воркерам через Schedule_changes.
+        """
+        schedule_cache.invalidate(sub_id)
+        if not self.is_running:
+            self._mark_changed(sub_id)
+            return
+        with self._lock:
+            self._dirty.add(sub_id)
+        self.notify()
 
     async def start(self, bot: Bot):
         if self.is_running:
@@ -55,29 +363,38 @@ class NewsScheduler:
 
         self.bot = bot
         self.is_running = True
-        self.current_task = asyncio.create_task(self.schedule_next_publication())
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._next_changes_poll = self._next_takeover_check = local_now() if self.worker_count > 1 else None
+        self._last_change_id = None
+        with self._lock:
+            self._reload_all = True
+        self.current_task = asyncio.create_task(self._run())
 
     async def stop(self):
         self.is_running = False
         if self.current_task:
             self.current_task.cancel()
-
+            try:
+                await self.current_task
+            except asyncio.CancelledError:
+                pass
+            self.current_task = None
+        self._loop = None
 
     async def trigger_immediate_check(self):
-        if self.current_task:
-            self.current_task.cancel()
-        await time_check(self.bot)
-        self.current_task = asyncio.create_task(self.schedule_next_publication())
+        """
+        Будить планувальник: він перечитує всі підписки та одразу публікує ті, час яких настав.
+        Не чекає завершення публікації, тому безпечна для виклику з обробників діалогів.
+        Якщо планувальник цього процесу не запущений, повне перечитування передається воркерам (маркер sub_id = 0).
+        """
+        if not self.is_running:
+            self._mark_changed(0)
+            return
+        with self._lock:
+            self._reload_all = True
+        self.notify()
 
 
 # Створюємо глобальний об'єкт планувальника
 scheduler = NewsScheduler()
-
-# В main_async() замініть виклик scheduled_news_publishing на:
-# await scheduler.start(bot)
-
-# Для зупинки планувальника (наприклад, при завершенні роботи бота):
-# await scheduler.stop()
-
-# Для ручного запуску перевірки з будь-якого модуля:
-# await scheduler.trigger_immediate_check()
\ No newline at end of file
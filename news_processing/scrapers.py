@@ -1,21 +1,293 @@
 import asyncio
 import logging
+import re
+import sys
+import time
+from pathlib import Path
 from typing import List, Optional, Callable
-import requests
-from bs4 import BeautifulSoup
+import aiohttp
+from bs4 import BeautifulSoup, NavigableString, Tag
 from playwright.async_api import async_playwright, Page
 
+from news_processing.concurrency import stage_limit
+from news_processing.http_client import http_client
+from news_processing.single_flight import single_flight
+
+# Readability-style main content extraction.
+# Class/id patterns of elements that are almost never part of the article body
+UNLIKELY_CANDIDATES = re.compile(r'\bads?\b|\bad-|advert|banner|breadcrumb|combx|comment|community|consent|'
+                                 r'cookie|disqus|footer|gdpr|header|menu|modal|nav|newsletter|popup|promo|related|'
+                                 r'remark|share|shoutbox|sidebar|social|sponsor|subscribe|tags|teaser|widget', re.I)
+MAYBE_CANDIDATE = re.compile(r'article|body|column|content|main|story|text', re.I)
+POSITIVE_WEIGHT = re.compile(r'article|body|content|entry|hentry|main|page|post|story|text|blog', re.I)
+NEGATIVE_WEIGHT = re.compile(r'hidden|banner|combx|comment|contact|cookie|foot|footnote|masthead|meta|outbrain|'
+                             r'promo|related|scroll|share|shoutbox|sidebar|skyscraper|sponsor|shopping|tags|tool|'
+                             r'widget|advert', re.I)
+# Tags that never contain article text
+REMOVED_TAGS = ('script', 'style', 'noscript', 'template', 'iframe', 'svg', 'canvas', 'form', 'button', 'input',
+                'select', 'textarea', 'nav', 'aside', 'footer')
+# Tags that start a new block of text
+BLOCK_TAGS = {'address', 'article', 'blockquote', 'dd', 'div', 'dl', 'dt', 'figcaption', 'figure', 'h1', 'h2', 'h3',
+              'h4', 'h5', 'h6', 'header', 'hr', 'li', 'main', 'ol', 'p', 'pre', 'section', 'table', 'tbody', 'td',
+              'th', 'thead', 'tr', 'ul'}
+HEADING_TAGS = {'h1', 'h2', 'h3', 'h4', 'h5', 'h6'}
+# Shorter paragraphs do not contribute to candidate scores
+MIN_PARAGRAPH_LENGTH = 25
+# If the extracted body is shorter than this, the page text is used as is
+MIN_ARTICLE_LENGTH = 200
+# Approximate characters per model token; conservative for Cyrillic text, which tokenizes denser than English
+CHARS_PER_TOKEN = 3
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate number of model tokens in text (no tokenizer dependency)."""
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text to about max_tokens, preferably at a paragraph, otherwise at a word boundary."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    limit = max_tokens * CHARS_PER_TOKEN
+    cut = text.rfind('\n', 0, limit)
+    if cut < limit // 2:
+        cut = text.rfind(' ', 0, limit)
+    if cut <= 0:
+        cut = limit
+    return text[:cut].rstrip()
+
+
+def _normalize(text: str) -> str:
+    return ' '.join(text.split())
+
+
+def _class_and_id(tag: Tag) -> str:
+    return f"{' '.join(tag.get('class') or [])} {tag.get('id') or ''}"
+
+
+def _class_weight(tag: Tag) -> int:
+    names = _class_and_id(tag)
+    weight = 0
+    if NEGATIVE_WEIGHT.search(names):
+        weight -= 25
+    if POSITIVE_WEIGHT.search(names):
+        weight += 25
+    return weight
+
+
+def _initial_score(tag: Tag) -> float:
+    score = _class_weight(tag)
+    if tag.name in ('article', 'main'):
+        score += 10
+    elif tag.name == 'div':
+        score += 5
+    elif tag.name in ('pre', 'td', 'blockquote'):
+        score += 3
+    elif tag.name in ('ol', 'ul', 'dl', 'dd', 'dt', 'li', 'form', 'address'):
+        score -= 3
+    elif tag.name in HEADING_TAGS or tag.name == 'th':
+        score -= 5
+    return score
+
+
+def _link_density(tag: Tag) -> float:
+    text_length = len(_normalize(tag.get_text(' ')))
+    if not text_length:
+        return 0.0
+    link_length = sum(len(_normalize(link.get_text(' '))) for link in tag.find_all('a'))
+    return link_length / text_length
+
+
+def _remove_boilerplate(soup: BeautifulSoup):
+    for tag in soup(REMOVED_TAGS):
+        tag.decompose()
+    for tag in soup.find_all(True):
+        if tag.decomposed or tag.name in ('html', 'body', 'article', 'main'):
+            continue
+        style = (tag.get('style') or '').replace(' ', '').lower()
+        if (tag.has_attr('hidden') or tag.get('aria-hidden') == 'true' or 'display:none' in style
+                or tag.get('role') in ('navigation', 'banner', 'contentinfo', 'dialog', 'complementary')):
+            tag.decompose()
+            continue
+        names = _class_and_id(tag)
+        if UNLIKELY_CANDIDATES.search(names) and not MAYBE_CANDIDATE.search(names):
+            tag.decompose()
+
+
+def _paragraphs(root: Tag) -> list[Tag]:
+    """Paragraph-like elements: p/pre/blockquote/td and divs without block children (text laid out with <br>)."""
+    paragraphs = []
+    for tag in root.find_all(('p', 'pre', 'blockquote', 'td', 'div')):
+        if tag.name == 'div' and tag.find(BLOCK_TAGS) is not None:
+            continue
+        paragraphs.append(tag)
+    return paragraphs
+
+
+def _top_candidate(root: Tag) -> Tag | None:
+    scores = {}  # id(tag) -> [tag, score]
+    for paragraph in _paragraphs(root):
+        text = _normalize(paragraph.get_text(' '))
+        if len(text) < MIN_PARAGRAPH_LENGTH:
+            continue
+        score = 1 + text.count(',') + text.count('，') + min(len(text) // 100, 3)
+        ancestor = paragraph.parent
+        for level in range(3):
+            if ancestor is None or ancestor.name in (None, '[document]'):
+                break
+            entry = scores.setdefault(id(ancestor), [ancestor, _initial_score(ancestor)])
+            entry[1] += score / (1, 2, 6)[level]
+            ancestor = ancestor.parent
+
+    best, best_score = None, 0.0
+    for tag, score in scores.values():
+        score *= 1 - _link_density(tag)
+        if score > best_score:
+            best, best_score = tag, score
+    if best is None:
+        return None
+
+    # Articles split into several sibling blocks (e.g. around an inline ad) are merged back
+    threshold = max(10.0, best_score * 0.2)
+    parent = best.parent
+    if parent is None:
+        return best
+    merged = BeautifulSoup('', 'html.parser').new_tag('div')
+    for sibling in list(parent.children):
+        if not isinstance(sibling, Tag):
+            continue
+        include = sibling is best
+        if not include and id(sibling) in scores:
+            include = scores[id(sibling)][1] * (1 - _link_density(sibling)) >= threshold
+        if not include and sibling.name == 'p':
+            text = _normalize(sibling.get_text(' '))
+            include = len(text) > 80 and _link_density(sibling) < 0.25
+        if include:
+            merged.append(sibling.extract() if sibling is not best else best.extract())
+    return merged
+
+
+def _text_blocks(element: Tag, blocks: list[str]):
+    """Collects text blocks of element in document order, skipping link lists (menus, related articles)."""
+    parts, link_length = [], 0
+
+    def flush():
+        text = _normalize(''.join(parts))
+        if text and (link_length / len(text) <= 0.5 or element.name in HEADING_TAGS):
+            blocks.append(text)
+        parts.clear()
+
+    for child in element.children:
+        if isinstance(child, NavigableString):
+            if type(child) is NavigableString:
+                parts.append(str(child))
+        elif child.name in BLOCK_TAGS:
+            flush()
+            link_length = 0
+            _text_blocks(child, blocks)
+        elif child.name == 'br':
+            parts.append(' ')
+        else:
+            text = child.get_text(' ')
+            parts.append(f' {text} ')
+            links = [child] if child.name == 'a' else child.find_all('a')
+            link_length += sum(len(_normalize(link.get_text(' '))) for link in links)
+    flush()
+
+
+def extract_main_content(html: str, parser: str = 'html.parser', max_tokens: Optional[int] = None) -> str:
+    """
+    Extract the article body from HTML, readability-style.
+
+    Boilerplate (scripts, navigation, footers, cookie banners, share/related widgets) is removed, every
+    paragraph adds a score to its parent and grandparent based on length and commas, the score is reduced
+    by link density, and the text of the best scoring block (plus similar sibling blocks) is returned,
+    preceded by the page title. Falls back to the whole page text when no article-like block is found.
+
+    :param html: Page HTML
+    :param parser: BeautifulSoup parser to use
+    :param max_tokens: Optional approximate token budget for the result
+    :return: Article text, paragraphs separated by blank lines
+    """
+    soup = BeautifulSoup(html, parser)
+    title_tag = soup.find('h1') or soup.find('title')
+    title = _normalize(title_tag.get_text(' ')) if title_tag else ''
+
+    _remove_boilerplate(soup)
+    root = soup.body or soup
+    candidate = _top_candidate(root)
+
+    blocks = []
+    if candidate is not None:
+        _text_blocks(candidate, blocks)
+    text = '\n\n'.join(blocks)
+    if len(text) < MIN_ARTICLE_LENGTH:
+        text = _normalize(root.get_text(' '))
+    elif title and not text.startswith(title):
+        text = f'{title}\n\n{text}'
+
+    return truncate_to_tokens(text, max_tokens) if max_tokens else text
+
 
 class WebScraper:
     @staticmethod
-    def scrape_static_page(url: str,
+    @single_flight('fetch_page',
+                   key=lambda url, headers=None, timeout=30: (url, repr(sorted((headers or {}).items()))))
+    async def fetch_page(url: str,
+                         headers: Optional[dict] = None,
+                         timeout: int = 30) -> str:
+        """
+        Download the raw HTML of a page once using the shared HTTP client.
+        Concurrent requests for the same URL share one download.
+
+        :param url: URL of the page to download
+        :param headers: Optional headers for the request
+        :param timeout: Request timeout in seconds
+        :return: Page HTML; raises on network errors and non-2xx responses
+        """
+        async with http_client.session().get(url, headers=headers,
+                                          timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+            response.raise_for_status()
+            return await response.text(errors='replace')
+
+    @staticmethod
+    async def extract_static_content(html: str,
+                                     selector: str = 'body',
+                                     parser: str = 'html.parser',
+                                     extract_method: Callable = lambda soup: soup.get_text(' '),
+                                     skip_tags: tuple = ('script', 'style', 'noscript', 'template')) -> str:
+        """
+        Extract content from already downloaded HTML without fetching it again.
+
+        :param html: Page HTML
+        :param selector: CSS selector to target specific elements
+        :param parser: BeautifulSoup parser to use
+        :param extract_method: Function to extract content from BeautifulSoup object
+        :param skip_tags: Tags whose contents are not visible text and are dropped before extraction
+        :return: Extracted content as string
+        """
+        def extract():
+            soup = BeautifulSoup(html, parser)
+            for tag in soup(skip_tags):
+                tag.decompose()
+            element = soup.select_one(selector)
+            return extract_method(element) if element is not None else ""
+
+        # Parsing is CPU-bound, so keep it off the event loop
+        content = await asyncio.to_thread(extract)
+        return content.strip() if isinstance(content, str) else content
+
+    @staticmethod
+    @single_flight('scrape_static_page')
+    async def scrape_static_page(url: str,
                            headers: Optional[dict] = None,
                            selector: str = 'body',
                            parser: str = 'html.parser',
-                           extract_method: Callable = lambda soup: soup.get_text(),
+                           extract_method: Callable = lambda soup: soup.get_text(' '),
                            timeout: int = 30) -> str:
         """
-        Scrape content from a static web page.
+        Scrape content from a static web page using the shared HTTP client.
+        Concurrent identical calls share one scrape.
 
         :param url: URL of the page to scrape
         :param headers: Optional headers for the request
@@ -26,16 +298,30 @@ class WebScraper:
         :return: Extracted content as string
         """
         try:
-            response = requests.get(url, headers=headers, timeout=timeout)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, parser)
-            content = extract_method(soup.select_one(selector))
-            return content.strip() if isinstance(content, str) else content
+            html = await WebScraper.fetch_page(url, headers=headers, timeout=timeout)
+            return await WebScraper.extract_static_content(html, selector=selector, parser=parser,
+                                                           extract_method=extract_method)
         except Exception as e:
             logging.error(f"Error scraping {url}: {str(e)}")
             return ""
 
     @staticmethod
+    async def extract_article(html: str,
+                              parser: str = 'html.parser',
+                              max_tokens: Optional[int] = None) -> str:
+        """
+        Extract only the article body from already downloaded HTML (see extract_main_content).
+
+        :param html: Page HTML
+        :param parser: BeautifulSoup parser to use
+        :param max_tokens: Optional approximate token budget for the result
+        :return: Article text
+        """
+        # Parsing and scoring are CPU-bound, so keep them off the event loop
+        return await asyncio.to_thread(extract_main_content, html, parser, max_tokens)
+
+    @staticmethod
+    @single_flight('scrape_dynamic_page')
     async def scrape_dynamic_page(url: str,
                                   timeout: int = 30000,
                                   wait_until: str = "networkidle",
@@ -47,9 +333,12 @@ class WebScraper:
                                   content_selectors: List[str] = ['p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'article',
                                                                   'section', 'div'],
                                   headless: bool = True,
-                                  proxy: Optional[dict] = None) -> str:
+                                  proxy: Optional[dict] = None,
+                                  return_html: bool = False) -> str:
         """
         Scrape content from a dynamic web page using Playwright.
+        Concurrent identical calls share one browser session, and only that session holds
+        a browser slot (stage_limit('browser')).
 
         :param url: URL of the page to scrape
         :param timeout: Navigation timeout in milliseconds
@@ -62,9 +351,10 @@ class WebScraper:
         :param content_selectors: List of selectors for content extraction
         :param headless: Whether to run browser in headless mode
         :param proxy: Optional proxy configuration
+        :param return_html: Return the rendered HTML instead of the text of content_selectors
         :return: Extracted content as string
         """
-        async with async_playwright() as p:
+        async with stage_limit('browser'), async_playwright() as p:
             browser = await p.chromium.launch(headless=headless)
             context = await browser.new_context(proxy=proxy) if proxy else await browser.new_context()
             page = await context.new_page()
@@ -82,6 +372,9 @@ class WebScraper:
                 if close_popups:
                     await WebScraper._close_popups(page, popup_selectors)
 
+                if return_html:
+                    return await page.content()
+
                 text_content = await page.evaluate(WebScraper._extract_content_js(content_selectors))
                 return text_content.strip()
             except Exception as e:
@@ -119,7 +412,7 @@ class WebScraper:
 # Usage example
 async def main():
     scraper = WebScraper()
-    static_content = scraper.scrape_static_page("https://example.com",
+    static_content = await scraper.scrape_static_page("https://example.com",
                                                 selector='body',
                                                 extract_method=lambda soup: soup.find_all('p'))
     print("Static content:", static_content)
@@ -129,7 +422,30 @@ async def main():
                                                         wait_for_selector='body',
                                                         content_selectors=['p', 'h1', 'article'])
     print("Dynamic content:", dynamic_content)
+    await http_client.close()
+
+
+def benchmark_extraction(fixtures_dir: Path):
+    """Compare the LLM input size of whole-page text and of the extracted article body on saved HTML pages."""
+    total_page, total_article = 0, 0
+    for path in sorted(fixtures_dir.glob('*.html')):
+        html = path.read_text(encoding='utf-8')
+        started = time.perf_counter()
+        article = extract_main_content(html)
+        elapsed = time.perf_counter() - started
+        page_text = BeautifulSoup(html, 'html.parser').body.get_text()
+        total_page += estimate_tokens(page_text)
+        total_article += estimate_tokens(article)
+        print(f"{path.name:<28} page text {estimate_tokens(page_text):>6} tokens -> article "
+              f"{estimate_tokens(article):>5} tokens ({1 - len(article) / len(page_text):.0%} smaller, "
+              f"{elapsed * 1000:.1f} ms)")
+    if total_page:
+        print(f"{'total':<28} page text {total_page:>6} tokens -> article {total_article:>5} tokens "
+              f"({1 - total_article / total_page:.0%} smaller)")
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    if sys.argv[1:] == ['--benchmark']:
+        benchmark_extraction(Path(__file__).parent / 'fixtures')
+    else:
+        asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,69 @@
+import asyncio
+import functools
+import json
+from typing import Callable, Hashable
+
+from news_processing.metrics import registry, Counter
+
+SINGLE_FLIGHT_TOTAL = registry.register(Counter(
+    'news_single_flight_total', 'Calls through single-flight groups: leader runs the call, follower shares it',
+    ('name', 'role')))
+
+
+class SingleFlight:
+    """
+    Об'єднання однакових одночасних викликів: поки виклик з ключем key виконується, наступні виклики
+    з тим самим ключем не запускають його вдруге, а чекають спільний результат (або спільний виняток).
+    Після завершення ключ звільняється, тож результати не кешуються - для цього є ResponseCache.
+
+    Спільний виклик захищений від скасування: якщо скасовано одного з тих, хто чекає (таймаут, скасування задачі),
+    інші отримають результат. Результат спільний для всіх, тому його не можна змінювати на місці.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, func: Callable, *args, **kwargs):
+        task = self._calls.get(key)
+        if task is None or task.get_loop() is not asyncio.get_running_loop():
+            task = asyncio.ensure_future(func(*args, **kwargs))
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._forget(key, task))
+            SINGLE_FLIGHT_TOTAL.inc(name=self.name, role='leader')
+        else:
+            SINGLE_FLIGHT_TOTAL.inc(name=self.name, role='follower')
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            task.exception()  # Виняток вже отримали ті, хто чекав; без цього asyncio попереджає, якщо їх скасовано
+
+    def __len__(self):
+        return len(self._calls)
+
+
+def _default_key(args: tuple, kwargs: dict) -> str:
+    return json.dumps([args, kwargs], ensure_ascii=False, sort_keys=True, default=repr)
+
+
+def single_flight(name: str, key: Callable | None = None):
+    """
+    Декоратор корутини: однакові одночасні виклики виконуються один раз.
+    key(*args, **kwargs) будує ключ з аргументів виклику; за замовчуванням - JSON усіх аргументів.
+    Використання: @single_flight('bing', key=lambda self, url: url)
+    """
+    def decorator(func):
+        flight = SingleFlight(name)
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            flight_key = key(*args, **kwargs) if key is not None else _default_key(args, kwargs)
+            return await flight.do(flight_key, func, *args, **kwargs)
+
+        wrapper.flight = flight
+        return wrapper
+
+    return decorator
@@ -0,0 +1,89 @@
+import asyncio
+import logging
+import multiprocessing
+import signal
+
+from aiogram import Bot
+from aiogram.client.default import DefaultBotProperties
+from aiogram.enums import ParseMode
+
+from config import BOT_TOKEN, PUBLISH_WORKERS, WEB_SERVER_HOST, WORKER_METRICS_PORT
+from db_layer.db_factory import get_data_serice
+from news_processing.fallback_translator import fallback_translator
+from news_processing.http_client import http_client
+from news_processing.llm_gateway import llm_gateway
+from news_processing.metrics import start_metrics_server
+from news_processing.outbox import outbox_sender
+from news_processing.response_cache import cache_connections
+from news_processing.scheduler import NewsScheduler
+
+
+async def run_worker(worker_index: int, worker_count: int):
+    """Запускає планувальник публікацій для одного шарду підписок до отримання SIGINT/SIGTERM."""
+    bot = Bot(token=BOT_TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
+    worker_scheduler = NewsScheduler(worker_index=worker_index, worker_count=worker_count)
+
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop_event.set)
+
+    metrics_runner = None
+    try:
+        async with get_data_serice() as db:
+            await db.create_db()
+        # Метрики воркера: /metrics на порту WORKER_METRICS_PORT + номер воркера (0 - вимкнено)
+        if WORKER_METRICS_PORT:
+            metrics_runner = await start_metrics_server(WEB_SERVER_HOST, WORKER_METRICS_PORT + worker_index)
+        await worker_scheduler.start(bot)
+        # Кожен воркер також відправляє записи outbox; записи захоплюються атомарно в БД
+        await outbox_sender.start(bot)
+        logging.info(f"Publishing worker {worker_index + 1}/{worker_count} started ({worker_scheduler.worker_id})")
+        await stop_event.wait()
+    finally:
+        await worker_scheduler.stop()
+        await outbox_sender.stop()
+        if metrics_runner:
+            await metrics_runner.cleanup()
+        await http_client.close()
+        await cache_connections.close()
+        await llm_gateway.close()
+        fallback_translator.close()
+        await bot.session.close()
+        logging.info(f"Publishing worker {worker_index + 1}/{worker_count} stopped")
+
+
+def _worker_process(worker_index: int, worker_count: int):
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run_worker(worker_index, worker_count))
+
+
+def start_workers(worker_count: int = PUBLISH_WORKERS) -> list[multiprocessing.Process]:
+    """Створює окремий процес-воркер для кожного шарду підписок."""
+    context = multiprocessing.get_context("spawn")
+    processes = []
+    for worker_index in range(worker_count):
+        process = context.Process(target=_worker_process, args=(worker_index, worker_count),
+                                  name=f"news-worker-{worker_index}", daemon=True)
+        process.start()
+        processes.append(process)
+    return processes
+
+
+def stop_workers(processes: list[multiprocessing.Process], timeout: float = 30):
+    """Надсилає воркерам SIGTERM і чекає їх завершення."""
+    for process in processes:
+        if process.is_alive():
+            process.terminate()
+    for process in processes:
+        process.join(timeout)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    workers = start_workers()
+    try:
+        for worker in workers:
+            worker.join()
+    except KeyboardInterrupt:
+        stop_workers(workers)
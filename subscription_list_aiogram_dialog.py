@@ -5,6 +5,7 @@ from aiogram_dialog.widgets.kbd import Button, ScrollingGroup, Select, Row
 from aiogram_dialog.widgets.text import Const, Format
 
 from db_layer.db_factory import get_data_serice
+from news_processing.scheduler import scheduler
 from states_class_aiogram_dialog import MainDialogSG, SecondDialogSG, EditSubscriptions
 
 
@@ -119,6 +120,7 @@ async def delete_subscription_message(
         async with get_data_serice() as db:
             # Видаляємо підписку з бази даних
             await db.delete_news(item_id)
+            scheduler.reschedule(item_id)
             logging.info(f"Підписка з ID {item_id} видалена з бази даних.")
 
             # Отримуємо оновлений список підписок
@@ -158,6 +160,7 @@ async def run_publication(callback: CallbackQuery, button: Button, dialog_manage
             await callback.message.answer("Публікація вже розпочата")
         else:
             await db.set_subscription_status(status='yes', sub_id=sub_id)
+            scheduler.reschedule(sub_id)
             await callback.message.answer("▶ Публікація розпочата.")
 
 async def stop_publication(callback: CallbackQuery, button: Button, dialog_manager: DialogManager):
@@ -169,6 +172,7 @@ async def stop_publication(callback: CallbackQuery, button: Button, dialog_manag
             await callback.message.answer("Публікація вже призупинена")
         else:
             await db.set_subscription_status(status='pause', sub_id=sub_id)
+            scheduler.reschedule(sub_id)
             await callback.message.answer("▶ Публікація призупинена.")
 
 
@@ -0,0 +1,55 @@
+import asyncio
+
+from db_layer.sql_data_service import SQLDataService
+from db_layer.sqlite_database import SQLiteDatabase
+
+DUE_AT = '2024-10-14 09:00:00'
+
+
+async def _new_subscription(db_path) -> tuple[SQLDataService, int]:
+    service = SQLDataService(SQLiteDatabase(str(db_path)))
+    await service.db.connect()
+    await service.create_db()
+    sub_id = await service.insert_news('IT', '@channel', '1')
+    return service, sub_id
+
+
+def test_failed_publication_can_be_claimed_again(tmp_path):
+    async def scenario():
+        service, sub_id = await _new_subscription(tmp_path / 'database.db')
+        try:
+            assert await service.claim_publication(sub_id, DUE_AT, 'worker-a', 900)
+            # Публікація не вдалася: last_pub_time не змінився, тому повтор має той самий due_at
+            await service.abandon_publication(sub_id, DUE_AT, 'worker-a')
+            assert await service.claim_publication(sub_id, DUE_AT, 'worker-a', 900)
+            await service.release_publication(sub_id, DUE_AT, 'worker-a')
+        finally:
+            await service.db.disconnect()
+
+    asyncio.run(scenario())
+
+
+def test_published_due_at_is_not_claimed_twice(tmp_path):
+    async def scenario():
+        service, sub_id = await _new_subscription(tmp_path / 'database.db')
+        try:
+            assert await service.claim_publication(sub_id, DUE_AT, 'worker-a', 900)
+            await service.release_publication(sub_id, DUE_AT, 'worker-a')
+            assert not await service.claim_publication(sub_id, DUE_AT, 'worker-b', 900)
+            assert await service.claim_publication(sub_id, '2024-10-14 10:00:00', 'worker-b', 900)
+        finally:
+            await service.db.disconnect()
+
+    asyncio.run(scenario())
+
+
+def test_active_lease_is_not_claimed_by_another_worker(tmp_path):
+    async def scenario():
+        service, sub_id = await _new_subscription(tmp_path / 'database.db')
+        try:
+            assert await service.claim_publication(sub_id, DUE_AT, 'worker-a', 900)
+            assert not await service.claim_publication(sub_id, DUE_AT, 'worker-b', 900)
+        finally:
+            await service.db.disconnect()
+
+    asyncio.run(scenario())
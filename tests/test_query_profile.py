@@ -0,0 +1,40 @@
+import asyncio
+
+from db_layer.sql_data_service import SQLDataService
+from db_layer.sqlite_database import SQLiteDatabase
+from news_processing import query_profiles
+from news_processing.query_profiles import QueryProfileCache
+
+
+def test_query_profile_is_loaded_with_subscription(tmp_path):
+    async def scenario():
+        service = SQLDataService(SQLiteDatabase(str(tmp_path / 'database.db')))
+        await service.db.connect()
+        try:
+            await service.create_db()
+            sub_id = await service.insert_news('Спорт', '@channel', '1')
+            await service.add_publish_date(sub_id, ['everyday'])
+            await service.add_publish_time(sub_id, ['09:00'])
+            [item] = await service.get_publishing_schedules(sub_ids=[sub_id])
+            assert item['query_profile'] is None
+
+            await service.save_query_profile(sub_id, 'Спорт', 'uk', 'UA', False)
+            await service.save_query_profile(sub_id, 'Спорт', 'ru', 'RU', False)
+            [item] = await service.get_publishing_schedules(sub_ids=[sub_id])
+            assert item['query_profile'] == ('Спорт', 'ru', 'RU', False)
+        finally:
+            await service.db.disconnect()
+
+    asyncio.run(scenario())
+
+
+def test_stored_profile_skips_language_detection(monkeypatch):
+    def detect(query):
+        raise AssertionError('language must not be detected again')
+
+    monkeypatch.setattr(query_profiles, 'detect_query_language', detect)
+    cache = QueryProfileCache(['sports'], {'uk': 'UA'})
+    cache.put('Спорт', 'uk', 'UA', False)
+    profile = cache.get('Спорт')
+    assert (profile.language, profile.region, profile.is_category) == ('uk', 'UA', False)
+    assert profile.params('standart')['setLang'] == 'uk'
@@ -7,6 +7,7 @@ from aiogram_dialog.widgets.input import ManagedTextInput
 from aiogram_dialog.widgets.kbd import Button
 
 from db_layer.db_factory import get_data_serice
+from news_processing.scheduler import scheduler
 from states_class_aiogram_dialog import EditSubscriptions
 
 
@@ -84,6 +85,7 @@ async def on_time_success(message: Message, widget: ManagedTextInput,
         corrected_times = sorted(corrected_times, key=lambda t: datetime.strptime(t, "%H:%M"))
 
         await db.add_publish_time(sub_id, corrected_times)
+    scheduler.reschedule(sub_id)
 
     await message.delete()
     await dialog_manager.switch_to(EditSubscriptions.edit_time_write)
@@ -95,6 +97,7 @@ async def time_selection_every_hour(callback: CallbackQuery, button: Button, dia
     async with get_data_serice() as db:
         await db.delete_times(sub_id)
         await db.add_publish_time(sub_id, [f'every-{number}-hour'])
+    scheduler.reschedule(sub_id)
     await dialog_manager.switch_to(EditSubscriptions.edit_t_time)
 
 
@@ -133,6 +136,7 @@ async def date_selection_every_day(callback: CallbackQuery, button: Button, dial
     async with get_data_serice() as db:
         await db.delete_dates(sub_id)
         await db.add_publish_date(sub_id, ['everyday'])
+    scheduler.reschedule(sub_id)
     await dialog_manager.switch_to(EditSubscriptions.edit_d_time)
 
 
@@ -147,6 +151,7 @@ async def finish_date_selection(callback: CallbackQuery, button: Button, manager
                 await db.delete_dates(sub_id)
                 break
         await db.add_publish_date(sub_id, selected_dates)
+    scheduler.reschedule(sub_id)
     dates_text = ", ".join([str(d) for d in selected_dates])
     await callback.message.answer(f"Ваш остаточний вибір: {dates_text}")
     await manager.switch_to(EditSubscriptions.edit_d_time)